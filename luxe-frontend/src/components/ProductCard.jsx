@@ -24,9 +24,11 @@ export default function ProductCard({ product }) {
   const navigate    = useNavigate();
 
   // ── Images: prefer images array, fall back to image_url ──
+  // Use the resized "card" derivative when the backend has built one.
   const imageList = (() => {
     if (product.images && product.images.length > 0)
-      return product.images.map(img => img.url);
+      return product.images.map(img => img.variants?.card?.webp || img.url);
+    if (product.primary_variants) return [product.primary_variants.card.webp];
     if (product.image_url) return [product.image_url];
     if (product.image)     return [product.image];
     return [];
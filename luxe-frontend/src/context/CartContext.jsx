@@ -49,11 +49,25 @@ export const CartProvider = ({ children }) => {
     }
   };
 
+  // Merge a ?response=delta payload into the cart instead of re-fetching it
+  const applyDelta = ({ items, removed, summary }) => {
+    setCart(prev => ({
+      ...prev,
+      ...summary,
+      items: prev.items
+        .filter(i => !removed.includes(i.id))
+        .map(i => {
+          const changed = items.find(d => d.id === i.id);
+          return changed ? { ...i, quantity: changed.quantity, subtotal: changed.subtotal } : i;
+        }),
+    }));
+  };
+
   // Update item quantity
   const updateQuantity = async (itemId, quantity) => {
     try {
-      const res = await API.patch(`cart/items/${itemId}/`, { quantity });
-      setCart(res.data);
+      const res = await API.patch(`cart/items/${itemId}/?response=delta`, { quantity });
+      applyDelta(res.data);
     } catch (err) {
       setCartError(err.response?.data?.detail || "Failed to update quantity.");
     }
@@ -62,13 +76,31 @@ export const CartProvider = ({ children }) => {
   // Remove single item
   const removeItem = async (itemId) => {
     try {
-      const res = await API.delete(`cart/items/${itemId}/`);
-      setCart(res.data);
+      const res = await API.delete(`cart/items/${itemId}/?response=delta`);
+      applyDelta(res.data);
     } catch {
       setCartError("Failed to remove item.");
     }
   };
 
+  // Apply several add / set / remove operations in one request, e.g. when
+  // restoring a saved cart. Returns the per-operation results.
+  const applyCartOperations = async (operations) => {
+    try {
+      setCartLoading(true);
+      const res = await API.post("cart/batch/", { operations });
+      setCart(res.data.cart);
+      const failed = res.data.results.find(r => r.status === "error");
+      if (failed) setCartError(typeof failed.detail === "string" ? failed.detail : "Some cart updates failed.");
+      return res.data.results;
+    } catch (err) {
+      setCartError(err.response?.data?.detail || "Failed to update cart.");
+      return null;
+    } finally {
+      setCartLoading(false);
+    }
+  };
+
   // Clear entire cart
   const clearCart = async () => {
     try {
@@ -90,6 +122,7 @@ export const CartProvider = ({ children }) => {
         updateQuantity,
         removeItem,
         clearCart,
+        applyCartOperations,
         fetchCart,
       }}
     >
@@ -0,0 +1,60 @@
+"""
+Maintained row counts for the admin dashboard.
+
+One Counter row per counted table, adjusted by signal receivers as rows are
+created and deleted (users here, products and orders in their apps'
+signals) and explicitly by code that bulk-creates rows, which sends no
+signals. The adjustment is an INSERT ... ON CONFLICT DO UPDATE sent once
+the caller's transaction commits: a rolled-back signup or checkout leaves
+the count alone, and concurrent checkouts don't queue on the counter row
+while they work. `manage.py reconcile_counters` repairs any drift.
+"""
+from django.apps import apps
+from django.db import connection, transaction
+
+from .models import Counter
+
+# Counter name -> counted model(s)
+COUNTED = {
+    'users':    ('accounts.User',),
+    'products': ('products.Product',),
+    'orders':   ('orders.Order', 'orders.ArchivedOrder'),   # archived orders still count
+}
+
+
+def increment(name, delta=1):
+    if delta:
+        transaction.on_commit(lambda: _add(name, delta))
+
+
+def _add(name, delta):
+    table = Counter._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (name, value) VALUES (%s, %s) '
+            f'ON CONFLICT (name) DO UPDATE SET value = {table}.value + excluded.value',
+            [name, delta],
+        )
+
+
+def decrement(name, delta=1):
+    increment(name, -delta)
+
+
+def reconcile():
+    """
+    Recount every counted table and fix its counter. Returns {name: (was, now)}
+    for the ones that drifted. A row committed just as a recount starts can be
+    counted twice (its increment lands after the recount) until the next run.
+    """
+    drifted = {}
+    for name, labels in COUNTED.items():
+        with transaction.atomic():
+            # Lock the counter so concurrent increments queue behind the recount
+            Counter.objects.get_or_create(name=name)
+            was = Counter.objects.select_for_update().get(name=name).value
+            now = sum(apps.get_model(label).objects.count() for label in labels)
+            if was != now:
+                Counter.objects.filter(name=name).update(value=now)
+                drifted[name] = (was, now)
+    return drifted
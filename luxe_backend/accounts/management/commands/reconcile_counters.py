@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from accounts.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        'Recount users, products and orders and repair the dashboard counters if they '
+        'drifted (bulk writes, raw SQL, fixtures). Safe to run from cron.'
+    )
+
+    def handle(self, *args, **kwargs):
+        drifted = reconcile()
+        for name, (was, now) in drifted.items():
+            self.stdout.write(f'  {name}: {was:,} → {now:,}')
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Counters reconciled ({len(drifted)} had drifted)' if drifted else '✓ Counters already match'
+        ))
@@ -0,0 +1,38 @@
+from django.db import migrations
+
+# Case-insensitive prefix indexes for the admin order search
+# (orders.views.filter_admin_orders: username/email istartswith).
+COLUMNS = ('username', 'email')
+
+
+def create_prefix_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for column in COLUMNS:
+        if vendor == 'sqlite':
+            # SQLite's LIKE is case-insensitive and can use a NOCASE index for 'abc%'
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS user_{column}_prefix_idx ON accounts_user ({column} COLLATE NOCASE)'
+            )
+        elif vendor == 'postgresql':
+            # Django renders istartswith as UPPER(col::text) LIKE UPPER('abc%')
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS user_{column}_prefix_idx ON accounts_user '
+                f'(UPPER({column}::text) text_pattern_ops)'
+            )
+
+
+def drop_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        for column in COLUMNS:
+            schema_editor.execute(f'DROP INDEX IF EXISTS user_{column}_prefix_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_user_date_joined_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prefix_indexes, drop_prefix_indexes),
+    ]
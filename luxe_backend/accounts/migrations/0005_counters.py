@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:23
+
+from django.db import migrations, models
+
+
+def seed_counters(apps, schema_editor):
+    Counter = apps.get_model('accounts', 'Counter')
+    for name, label in (('users', 'accounts.User'), ('products', 'products.Product'), ('orders', 'orders.Order')):
+        Counter.objects.create(name=name, value=apps.get_model(label).objects.count())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_user_prefix_search_idx'),
+        ('products', '0007_stock_shards'),    # the seed counts their tables
+        ('orders', '0005_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Counter',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
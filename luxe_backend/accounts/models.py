@@ -7,5 +7,20 @@ class User(AbstractUser):
     full_name  = models.CharField(max_length=150, blank=True)
     ban_reason = models.TextField(blank=True, default="")
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=['date_joined'], name='user_date_joined_idx'),   # admin user list
+        ]
+        # Case-insensitive username/email prefix indexes are vendor-specific: see migration 0004
+
     def __str__(self):
         return self.username
+
+
+class Counter(models.Model):
+    """A maintained row count (see accounts.counters), so the dashboard never runs COUNT(*) on big tables."""
+    name  = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
@@ -4,6 +4,7 @@ from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate, get_user_model
+from orders.idempotency import idempotent
 from .serializers import RegisterSerializer, UserSerializer, AdminCreateSerializer
 
 User = get_user_model()
@@ -16,11 +17,17 @@ def get_tokens_for_user(user):
 
 # ── Auth ─────────────────────────────────────────────────────────────────────
 
+def with_fresh_tokens(data):
+    """Replayed signups get new tokens; stored responses never hold any."""
+    return {**get_tokens_for_user(User.objects.get(pk=data['user']['id'])), **data}
+
+
 class SignupView(generics.CreateAPIView):
-    """POST /api/signup/"""
+    """POST /api/signup/  — honours Idempotency-Key, so a retried signup returns the same user"""
     permission_classes = [AllowAny]
     serializer_class   = RegisterSerializer
 
+    @idempotent(exclude=('access', 'refresh'), on_replay=with_fresh_tokens)
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -212,20 +219,28 @@ class AdminStatsView(APIView):
     permission_classes = [IsAdminUser]
 
     def get(self, request):
-        from products.models import Product
-        from orders.models import Order
-        from django.db.models import Sum
-
-        total_users    = User.objects.count()
-        total_products = Product.objects.count()
-        total_orders   = Order.objects.count()
-        total_revenue  = Order.objects.filter(
-            status__in=['confirmed', 'shipped', 'delivered']
-        ).aggregate(rev=Sum('total'))['rev'] or 0
+        from decimal import Decimal
+        from django.db.models import CharField, F, Value
+        from orders.models import SalesTotal
+        from .counters import COUNTED
+        from .models import Counter
+
+        # One query over two primary-key lookups: the maintained counters
+        # (accounts.counters) and the running revenue total (orders.rollups).
+        # Both sides select annotations only, so the UNION lines their columns up.
+        stats = dict(
+            Counter.objects.filter(name__in=COUNTED)
+            .annotate(stat=F('name'), amount=F('value')).values_list('stat', 'amount')
+            .union(
+                SalesTotal.objects.filter(id=1)
+                .annotate(stat=Value('revenue', output_field=CharField()), amount=F('revenue'))
+                .values_list('stat', 'amount')
+            )
+        )
 
         return Response({
-            'total_users':    total_users,
-            'total_products': total_products,
-            'total_orders':   total_orders,
-            'total_revenue':  total_revenue,
+            'total_users':    int(stats.get('users', 0)),
+            'total_products': int(stats.get('products', 0)),
+            'total_orders':   int(stats.get('orders', 0)),
+            'total_revenue':  Decimal(str(stats.get('revenue', 0))).quantize(Decimal('0.01')),
         })
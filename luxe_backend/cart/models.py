@@ -1,8 +1,39 @@
+from decimal import Decimal
+
 from django.db import models
+from django.db.models import DecimalField, F, Prefetch, Sum
 from django.conf import settings
 from products.models import Product
 
 
+def cart_items_prefetch():
+    """
+    Items, then their products as Product.objects.with_related() loads them
+    (category, sharded stock sums) and images: three queries whatever the
+    cart size.
+    """
+    return Prefetch(
+        'items',
+        queryset=CartItem.objects.prefetch_related(Prefetch('product', queryset=Product.objects.with_related()))
+                                 .order_by('id'),
+    )
+
+
+class CartQuerySet(models.QuerySet):
+    def with_items(self):
+        return self.prefetch_related(cart_items_prefetch())
+
+
+class CartItemQuerySet(models.QuerySet):
+    def summary(self):
+        """{'item_count', 'total'} of these lines in one aggregate query."""
+        line_total = F('product__price') * F('quantity')
+        return self.aggregate(
+            item_count=Sum('quantity', default=0),
+            total=Sum(line_total, default=Decimal('0'), output_field=DecimalField(max_digits=12, decimal_places=2)),
+        )
+
+
 class Cart(models.Model):
     user = models.OneToOneField(
         settings.AUTH_USER_MODEL,
@@ -12,16 +43,27 @@ class Cart(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CartQuerySet.as_manager()
+
     def __str__(self):
         return f"Cart of {self.user.username}"
 
     @property
     def total(self):
-        return sum(item.subtotal for item in self.items.all())
+        if self._items_loaded():
+            return sum((item.subtotal for item in self.items.all()), Decimal('0'))
+        return self.items.summary()['total']
 
     @property
     def item_count(self):
-        return sum(item.quantity for item in self.items.all())
+        if self._items_loaded():
+            return sum(item.quantity for item in self.items.all())
+        return self.items.summary()['item_count']
+
+    def _items_loaded(self):
+        # Use the prefetched rows when there are any; otherwise aggregate in SQL
+        # instead of loading every item and its product.
+        return 'items' in getattr(self, '_prefetched_objects_cache', {})
 
 
 class CartItem(models.Model):
@@ -30,6 +72,8 @@ class CartItem(models.Model):
     quantity = models.PositiveIntegerField(default=1)
     added_at = models.DateTimeField(auto_now_add=True)
 
+    objects = CartItemQuerySet.as_manager()
+
     class Meta:
         unique_together = ('cart', 'product')
 
@@ -0,0 +1,203 @@
+"""
+Race-free cart mutations.
+
+Each mutation is a single conditional statement whose WHERE clause carries
+the stock check, so concurrent requests (double clicks, several tabs)
+cannot lose an update or push a line past the product's stock. Whether a
+statement applied is read from its row count; only a refused mutation
+pays for the extra lookup that explains why. Stock checks read the shard
+sum for products in sharded inventory mode (see products.inventory).
+"""
+from django.db import connection, transaction
+from django.db.models import Exists, F, OuterRef, Subquery
+from django.utils import timezone
+from rest_framework import status
+
+from products.inventory import effective_stock_expression
+from products.models import Product, StockShard
+from .models import CartItem
+
+
+class CartError(Exception):
+    status_code = status.HTTP_400_BAD_REQUEST
+
+    def __init__(self, detail):
+        super().__init__(detail)
+        self.detail = detail
+
+
+class ProductUnavailable(CartError):
+    status_code = status.HTTP_404_NOT_FOUND
+
+
+class ItemNotFound(CartError):
+    status_code = status.HTTP_404_NOT_FOUND
+
+
+class StockExceeded(CartError):
+    pass
+
+
+def _with_stock(products):
+    return products.annotate(effective_stock=effective_stock_expression())
+
+
+def _stock(product_ref):
+    """Scalar subquery for an available product's stock (NULL if unavailable)."""
+    return Subquery(
+        _with_stock(Product.objects.filter(id=product_ref, is_available=True)).order_by().values('effective_stock')[:1]
+    )
+
+
+def _increment(cart, product_id, quantity):
+    # UPDATE ... SET quantity = quantity + n WHERE ... AND quantity + n <= stock
+    return (
+        CartItem.objects
+        .filter(cart=cart, product_id=product_id, quantity__lte=_stock(product_id) - quantity)
+        .update(quantity=F('quantity') + quantity)
+    )
+
+
+def _insert(cart, product_id, quantity):
+    # INSERT ... SELECT inserts nothing if the product lacks the stock, and
+    # ON CONFLICT leaves a row a concurrent request just created to _increment.
+    item    = CartItem._meta
+    product = Product._meta
+    shard   = StockShard._meta
+    sql = (
+        f'INSERT INTO {item.db_table} (cart_id, product_id, quantity, added_at) '
+        f'SELECT %s, id, %s, %s FROM {product.db_table} '
+        f'WHERE id = %s AND is_available = %s AND (CASE WHEN stock_shards > 0 THEN '
+        f'(SELECT COALESCE(SUM(stock), 0) FROM {shard.db_table} WHERE product_id = %s) ELSE stock END) >= %s '
+        f'ON CONFLICT (cart_id, product_id) DO NOTHING'
+    )
+    with connection.cursor() as cursor:
+        added_at = connection.ops.adapt_datetimefield_value(timezone.now())   # stored as the ORM would
+        cursor.execute(sql, [cart.id, quantity, added_at, product_id, True, product_id, quantity])
+        return cursor.rowcount
+
+
+def add_item(cart, product_id, quantity):
+    """Insert a cart line or increment it by `quantity`, never beyond stock."""
+    if _increment(cart, product_id, quantity) or _insert(cart, product_id, quantity):
+        return
+    # A concurrent request may have inserted the line between the two statements
+    if _increment(cart, product_id, quantity):
+        return
+
+    stock = _with_stock(Product.objects.filter(id=product_id, is_available=True)) \
+        .values_list('effective_stock', flat=True).first()
+    if stock is None:
+        raise ProductUnavailable('Product not found.')
+    current = CartItem.objects.filter(cart=cart, product_id=product_id).values_list('quantity', flat=True).first()
+    if current:
+        raise StockExceeded(
+            f'You already have {current} in your cart. '
+            f'Cannot add {quantity} more — only {stock} in stock.'
+        )
+    raise StockExceeded(f'Only {stock} unit(s) available in stock.')
+
+
+def set_item_quantity(cart, item_id, quantity):
+    """Set a cart line's quantity, never beyond stock."""
+    in_stock = Exists(_with_stock(Product.objects.filter(id=OuterRef('product_id'))).filter(effective_stock__gte=quantity))
+    if CartItem.objects.filter(in_stock, id=item_id, cart=cart).update(quantity=quantity):
+        return
+
+    product_id = CartItem.objects.filter(id=item_id, cart=cart).values_list('product_id', flat=True).first()
+    if product_id is None:
+        raise ItemNotFound('Cart item not found.')
+    stock = _with_stock(Product.objects.filter(id=product_id)).values_list('effective_stock', flat=True).get()
+    raise StockExceeded(f'Only {stock} unit(s) available in stock.')
+
+
+def remove_item(cart, item_id):
+    if not CartItem.objects.filter(id=item_id, cart=cart).delete()[0]:
+        raise ItemNotFound('Cart item not found.')
+
+
+# ── Batches ─────────────────────────────────────────────────────────────────
+
+def apply_batch(cart, operations):
+    """
+    Apply validated add / set / remove operations (each carrying its `index`
+    in the request) in order, in one transaction.
+
+    Stock for every product involved is read (and row-locked) in one query
+    and the cart lines in another; operations are then played against that
+    state in memory, so a failed operation is reported and skipped without
+    affecting the rest. The final lines are written back with at most one
+    upsert and one delete. Returns one result dict per operation.
+    """
+    with transaction.atomic():
+        lines = {
+            item.product_id: item
+            for item in CartItem.objects.select_for_update().filter(cart=cart)
+        }
+        by_item     = {item.id: product_id for product_id, item in lines.items()}
+        product_ids = set(lines) | {op['product_id'] for op in operations if op.get('product_id')}
+        products    = {
+            p['id']: p
+            for p in _with_stock(Product.objects.select_for_update().filter(id__in=product_ids))
+                                    .order_by('id').values('id', 'is_available', 'effective_stock')
+        }
+
+        quantities = {product_id: item.quantity for product_id, item in lines.items()}
+        results    = []
+        for op in operations:
+            try:
+                _apply(op, quantities, products, by_item)
+                results.append({'index': op['index'], 'op': op['op'], 'status': 'ok'})
+            except CartError as exc:
+                results.append({'index': op['index'], 'op': op['op'], 'status': 'error', 'detail': exc.detail})
+
+        changed = [
+            CartItem(cart=cart, product_id=product_id, quantity=quantity)
+            for product_id, quantity in quantities.items()
+            if product_id not in lines or lines[product_id].quantity != quantity
+        ]
+        if changed:
+            CartItem.objects.bulk_create(
+                changed, update_conflicts=True,
+                unique_fields=['cart', 'product'], update_fields=['quantity'],
+            )
+        removed = [lines[product_id].id for product_id in lines.keys() - quantities.keys()]
+        if removed:
+            CartItem.objects.filter(id__in=removed).delete()
+    return results
+
+
+def _apply(op, quantities, products, by_item):
+    if op.get('item_id') is not None:
+        product_id = by_item.get(op['item_id'])
+        if product_id is None or product_id not in quantities:
+            raise ItemNotFound('Cart item not found.')
+    else:
+        product_id = op['product_id']
+
+    current = quantities.get(product_id, 0)
+    if op['op'] == 'remove':
+        if not current:
+            raise ItemNotFound('Cart item not found.')
+        del quantities[product_id]
+        return
+
+    product = products.get(product_id)
+    if product is None or (not current and not product['is_available']):
+        raise ProductUnavailable('Product not found.')
+    if op['op'] == 'add':
+        if not product['is_available']:
+            raise ProductUnavailable('Product not found.')
+        wanted = current + op['quantity']
+        if wanted > product['effective_stock']:
+            if current:
+                raise StockExceeded(
+                    f'You already have {current} in your cart. '
+                    f'Cannot add {op["quantity"]} more — only {product["effective_stock"]} in stock.'
+                )
+            raise StockExceeded(f'Only {product["effective_stock"]} unit(s) available in stock.')
+    else:
+        wanted = op['quantity']
+        if wanted > product['effective_stock']:
+            raise StockExceeded(f'Only {product["effective_stock"]} unit(s) available in stock.')
+    quantities[product_id] = wanted
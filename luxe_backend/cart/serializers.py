@@ -26,3 +26,24 @@ class CartSerializer(serializers.ModelSerializer):
 class AddToCartSerializer(serializers.Serializer):
     product_id = serializers.IntegerField()
     quantity = serializers.IntegerField(default=1, min_value=1)
+
+
+class CartBatchOperationSerializer(serializers.Serializer):
+    """One entry of POST /api/cart/batch/ — lines are addressed by item_id or product_id."""
+    OPS = ('add', 'set', 'remove')
+
+    op         = serializers.ChoiceField(choices=OPS)
+    product_id = serializers.IntegerField(required=False)
+    item_id    = serializers.IntegerField(required=False)
+    quantity   = serializers.IntegerField(min_value=1, required=False)
+
+    def validate(self, data):
+        if ('product_id' in data) == ('item_id' in data):
+            raise serializers.ValidationError('Give exactly one of product_id or item_id.')
+        if data['op'] == 'add':
+            if 'product_id' not in data:
+                raise serializers.ValidationError('add takes a product_id.')
+            data.setdefault('quantity', 1)
+        elif data['op'] == 'set' and 'quantity' not in data:
+            raise serializers.ValidationError('set takes a quantity.')
+        return data
@@ -0,0 +1,94 @@
+import threading
+from collections import Counter
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TransactionTestCase
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+
+from products.inventory import enable_sharding
+from products.models import Category, Product, ProductImage
+from .models import Cart, CartItem
+from .views import AddToCartView, UpdateCartItemView
+
+User = get_user_model()
+
+
+class CartQueryTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='shopper', password='pw')
+        self.cart = Cart.objects.create(user=self.user)
+        self.category = Category.objects.create(name='Bags', slug='bags')
+        self.client.force_authenticate(self.user)
+
+    def fill(self, lines):
+        for i in range(lines):
+            product = Product.objects.create(name=f'Bag {i}', description='d', price=Decimal('10.00'),
+                                             category=self.category, stock=8)
+            ProductImage.objects.create(product=product, url=f'https://img.example.com/{product.id}.jpg', order=0)
+            if i % 4 == 0:
+                enable_sharding(product.id, 4)
+            CartItem.objects.create(cart=self.cart, product=product, quantity=1)
+
+    def test_get_cart_query_count_does_not_grow_with_sharded_lines(self):
+        for lines in (4, 16):   # 1 then 5 sharded products
+            self.fill(lines)
+            with self.assertNumQueries(4):   # cart, items, products (stock summed), images
+                response = self.client.get('/api/cart/')
+            self.assertEqual(len(response.data['items']), CartItem.objects.count())
+            self.assertTrue(all(item['product']['stock'] == 8 for item in response.data['items']))
+
+
+class ConcurrentCartTests(TransactionTestCase):
+    """One cart line hammered from real threads with adds and oversized quantity updates."""
+    STOCK, THREADS, ADDS = 60, 8, 25
+
+    def setUp(self):
+        self.user    = User.objects.create_user(username='hammer', password='pw')
+        self.product = Product.objects.create(name='Cart stress product', description='d', price=Decimal('1.00'),
+                                              stock=self.STOCK)
+        self.cart    = Cart.objects.create(user=self.user)
+
+    def test_no_lost_updates_and_no_oversold_line(self):
+        factory = APIRequestFactory()
+        results = Counter()
+        lock    = threading.Lock()
+        start   = threading.Barrier(self.THREADS)
+
+        def worker(index):
+            add, update = AddToCartView.as_view(), UpdateCartItemView.as_view()
+            try:
+                start.wait()
+                for n in range(self.ADDS):
+                    request = factory.post('/api/cart/add/', {'product_id': self.product.id, 'quantity': 1},
+                                           format='json')
+                    force_authenticate(request, user=self.user)
+                    code = add(request).status_code
+                    with lock:
+                        results[code] += 1
+                    # Interleave absolute updates that must never lift the line past stock
+                    if index == 0 and n % 5 == 4:
+                        item_id = CartItem.objects.filter(cart=self.cart).values_list('id', flat=True).first()
+                        if item_id:
+                            request = factory.patch(f'/api/cart/items/{item_id}/', {'quantity': self.STOCK + 1},
+                                                    format='json')
+                            force_authenticate(request, user=self.user)
+                            code = update(request, item_id=item_id).status_code
+                            with lock:
+                                results[f'update {code}'] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        quantity = CartItem.objects.filter(cart=self.cart).values_list('quantity', flat=True).get()
+        self.assertEqual(set(results) - {200, 400, 'update 400'}, set(), results)
+        self.assertEqual(quantity, self.STOCK)          # 200 adds of one unit against 60 in stock
+        self.assertEqual(results[200], quantity)        # every accepted add is in the line
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, self.STOCK)   # carts never touch stock
@@ -1,9 +1,11 @@
 from django.urls import path
-from .views import CartView, AddToCartView, UpdateCartItemView, ClearCartView
+from .views import CartView, CartSummaryView, AddToCartView, UpdateCartItemView, ClearCartView, CartBatchView
 
 urlpatterns = [
     path('cart/', CartView.as_view(), name='cart'),
+    path('cart/summary/', CartSummaryView.as_view(), name='cart-summary'),
     path('cart/add/', AddToCartView.as_view(), name='cart-add'),
     path('cart/items/<int:item_id>/', UpdateCartItemView.as_view(), name='cart-item'),
     path('cart/clear/', ClearCartView.as_view(), name='cart-clear'),
+    path('cart/batch/', CartBatchView.as_view(), name='cart-batch'),
 ]
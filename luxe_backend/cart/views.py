@@ -1,11 +1,13 @@
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.shortcuts import get_object_or_404
-from products.models import Product
-from .models import Cart, CartItem
-from .serializers import CartSerializer, AddToCartSerializer
+from django.db.models import prefetch_related_objects
+from orders.idempotency import idempotent
+from .models import Cart, CartItem, cart_items_prefetch
+from .mutations import CartError, add_item, apply_batch, remove_item, set_item_quantity
+from .serializers import CartSerializer, AddToCartSerializer, CartBatchOperationSerializer
 
 
 def get_or_create_cart(user):
@@ -13,104 +15,175 @@ def get_or_create_cart(user):
     return cart
 
 
+def serialize_cart(request, cart):
+    """
+    Serialize `cart` from freshly prefetched items, so it costs the same few
+    queries however many items the cart holds.
+    """
+    if hasattr(cart, '_prefetched_objects_cache'):
+        cart._prefetched_objects_cache.pop('items', None)
+    prefetch_related_objects([cart], cart_items_prefetch())
+    return CartSerializer(cart, context={'request': request}).data
+
+
+def serialize_summary(summary):
+    return {'item_count': summary['item_count'], 'total': f'{summary["total"]:.2f}'}
+
+
+def cart_response(request, cart, changed=None, removed=()):
+    """
+    The response for a cart mutation, per ?response=:
+      cart (default) — the full serialized cart
+      summary        — { item_count, total }, one aggregate query
+      delta          — { items: [changed lines], removed: [item ids], summary }
+    `changed` is a CartItem queryset of the lines the mutation touched.
+    """
+    mode = request.query_params.get('response', 'cart')
+    if mode not in ('summary', 'delta'):
+        return Response(serialize_cart(request, cart))
+
+    summary = serialize_summary(cart.items.summary())
+    if mode == 'summary':
+        return Response(summary)
+
+    items = [
+        {
+            'id':         line['id'],
+            'product_id': line['product_id'],
+            'quantity':   line['quantity'],
+            'subtotal':   f'{line["product__price"] * line["quantity"]:.2f}',
+        }
+        for line in (changed.values('id', 'product_id', 'quantity', 'product__price') if changed is not None else [])
+    ]
+    return Response({'items': items, 'removed': list(removed), 'summary': summary})
+
+
+class CartMutationView(APIView):
+    """Base for views that change the cart and answer through cart_response()."""
+    permission_classes = [IsAuthenticated]
+    RESPONSE_MODES     = ('cart', 'summary', 'delta')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.query_params.get('response', 'cart') not in self.RESPONSE_MODES:
+            raise ValidationError({'response': f'Choose one of: {", ".join(self.RESPONSE_MODES)}.'})
+
+
 class CartView(APIView):
     """GET /api/cart/"""
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        cart       = get_or_create_cart(request.user)
-        serializer = CartSerializer(cart, context={'request': request})
-        return Response(serializer.data)
+        return Response(serialize_cart(request, get_or_create_cart(request.user)))
+
+
+class CartSummaryView(APIView):
+    """GET /api/cart/summary/  — { item_count, total } for the navbar badge, one query"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(serialize_summary(CartItem.objects.filter(cart__user=request.user).summary()))
 
 
-class AddToCartView(APIView):
+class AddToCartView(CartMutationView):
     """
-    POST /api/cart/add/
+    POST /api/cart/add/?response=cart|summary|delta
     Body: { product_id, quantity }
-    Validates quantity does not exceed available stock.
+    Validates quantity does not exceed available stock. With an Idempotency-Key
+    header a retried add is applied once.
     """
-    permission_classes = [IsAuthenticated]
 
+    @idempotent()
     def post(self, request):
         serializer = AddToCartSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
         product_id = serializer.validated_data['product_id']
-        quantity   = serializer.validated_data['quantity']
+        cart       = get_or_create_cart(request.user)
+        try:
+            # Hard cap: quantity can never exceed current stock, even under concurrent adds
+            add_item(cart, product_id, serializer.validated_data['quantity'])
+        except CartError as exc:
+            return Response({'detail': exc.detail}, status=exc.status_code)
 
-        product = get_object_or_404(Product, id=product_id, is_available=True)
+        return cart_response(request, cart, changed=cart.items.filter(product_id=product_id))
 
-        # Hard cap: quantity can never exceed current stock
-        if quantity > product.stock:
-            return Response(
-                {'detail': f'Only {product.stock} unit(s) available in stock.'},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
 
-        cart = get_or_create_cart(request.user)
-        item, created = CartItem.objects.get_or_create(
-            cart=cart, product=product,
-            defaults={'quantity': quantity},
-        )
-
-        if not created:
-            new_qty = item.quantity + quantity
-            if new_qty > product.stock:
-                return Response(
-                    {
-                        'detail': (
-                            f'You already have {item.quantity} in your cart. '
-                            f'Cannot add {quantity} more — only {product.stock} in stock.'
-                        )
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-            item.quantity = new_qty
-            item.save()
-
-        return Response(CartSerializer(cart, context={'request': request}).data)
-
-
-class UpdateCartItemView(APIView):
+class UpdateCartItemView(CartMutationView):
     """
     PATCH  /api/cart/items/<id>/   — update quantity (validated against stock)
     DELETE /api/cart/items/<id>/   — remove item
+    Both accept ?response=cart|summary|delta.
     """
-    permission_classes = [IsAuthenticated]
 
     def patch(self, request, item_id):
-        cart = get_or_create_cart(request.user)
-        item = get_object_or_404(CartItem, id=item_id, cart=cart)
-
-        quantity = request.data.get('quantity')
-        if not quantity or int(quantity) < 1:
+        try:
+            quantity = int(request.data.get('quantity') or 0)
+        except (TypeError, ValueError):
+            quantity = 0
+        if quantity < 1:
             return Response({'detail': 'Quantity must be at least 1.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        quantity = int(quantity)
-
-        # Validate against current stock
-        if quantity > item.product.stock:
-            return Response(
-                {'detail': f'Only {item.product.stock} unit(s) available in stock.'},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        item.quantity = quantity
-        item.save()
-        return Response(CartSerializer(cart, context={'request': request}).data)
+        cart = get_or_create_cart(request.user)
+        try:
+            set_item_quantity(cart, item_id, quantity)
+        except CartError as exc:
+            return Response({'detail': exc.detail}, status=exc.status_code)
+        return cart_response(request, cart, changed=cart.items.filter(id=item_id))
 
     def delete(self, request, item_id):
         cart = get_or_create_cart(request.user)
-        item = get_object_or_404(CartItem, id=item_id, cart=cart)
-        item.delete()
-        return Response(CartSerializer(cart, context={'request': request}).data)
+        try:
+            remove_item(cart, item_id)
+        except CartError as exc:
+            return Response({'detail': exc.detail}, status=exc.status_code)
+        return cart_response(request, cart, removed=[item_id])
 
 
-class ClearCartView(APIView):
-    """DELETE /api/cart/clear/"""
-    permission_classes = [IsAuthenticated]
+class ClearCartView(CartMutationView):
+    """DELETE /api/cart/clear/?response=cart|summary|delta"""
 
     def delete(self, request):
         cart = get_or_create_cart(request.user)
+        removed = []
+        if request.query_params.get('response') == 'delta':
+            removed = list(cart.items.values_list('id', flat=True))
         cart.items.all().delete()
-        return Response(CartSerializer(cart, context={'request': request}).data)
\ No newline at end of file
+        return cart_response(request, cart, removed=removed)
+
+
+class CartBatchView(APIView):
+    """
+    POST /api/cart/batch/
+    Body: { operations: [ { op: add|set|remove, product_id | item_id, quantity } ] }
+    Applies the operations in order in one transaction and returns
+    { results: [ { index, op, status, detail? } ], cart }. A failing operation
+    is reported and skipped; the others still apply.
+    """
+    permission_classes = [IsAuthenticated]
+    MAX_OPERATIONS = 100
+
+    def post(self, request):
+        operations = request.data.get('operations') if isinstance(request.data, dict) else None
+        if not isinstance(operations, list) or not operations:
+            return Response({'detail': 'Expected a non-empty list of operations.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(operations) > self.MAX_OPERATIONS:
+            return Response(
+                {'detail': f'At most {self.MAX_OPERATIONS} operations per batch.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        valid, invalid = [], []
+        for index, raw in enumerate(operations):
+            serializer = CartBatchOperationSerializer(data=raw)
+            if serializer.is_valid():
+                valid.append({**serializer.validated_data, 'index': index})
+            else:
+                op = raw.get('op') if isinstance(raw, dict) else None
+                invalid.append({'index': index, 'op': op, 'status': 'error', 'detail': serializer.errors})
+
+        cart    = get_or_create_cart(request.user)
+        results = apply_batch(cart, valid) if valid else []
+        results = sorted(results + invalid, key=lambda r: r['index'])
+
+        return Response({'results': results, 'cart': serialize_cart(request, cart)})
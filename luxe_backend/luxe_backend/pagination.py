@@ -0,0 +1,166 @@
+import datetime
+import hashlib
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+COUNT_CACHE_TIMEOUT = 60
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder truncates datetimes to milliseconds; cursors need them exact."""
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def cached_count(queryset, namespace=''):
+    """
+    COUNT(*) for `queryset`, cached briefly per distinct SQL statement.
+    Views can supply a `namespace` (e.g. a data version) to invalidate early.
+    """
+    sql, params = queryset.query.sql_with_params()
+    key = f'count:{namespace}:' + hashlib.md5(f'{sql}|{params!r}'.encode()).hexdigest()
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, COUNT_CACHE_TIMEOUT)
+    return count
+
+
+class CachedCountPaginator(Paginator):
+    def __init__(self, *args, count_namespace='', **kwargs):
+        super().__init__(*args, **kwargs)
+        self.count_namespace = count_namespace
+
+    @cached_property
+    def count(self):
+        return cached_count(self.object_list, self.count_namespace)
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Page-number pagination by default, keyset pagination on request.
+
+    ?page=<n>    — classic pages; the total count is cached for a minute.
+    ?cursor=     — start keyset mode (empty value = first page). The response
+                   carries an opaque `next` link that seeks past the last row
+                   of the current page with a WHERE clause on the queryset's
+                   ordering (plus id as a tiebreaker), so deep pages cost the
+                   same as the first. `count` is omitted unless ?count=true.
+
+    Views may define get_count_cache_namespace() to scope the cached counts.
+    """
+    cursor_query_param = 'cursor'
+
+    def django_paginator_class(self, object_list, per_page):
+        return CachedCountPaginator(object_list, per_page, count_namespace=self.count_namespace)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        get_namespace = getattr(view, 'get_count_cache_namespace', None)
+        self.count_namespace = get_namespace() if get_namespace else ''
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request   = request
+        self.page_size = self.get_page_size(request)
+        self.ordering  = self._get_ordering(queryset)
+        self.count     = None
+        if request.query_params.get('count') == 'true':
+            self.count = cached_count(queryset, self.count_namespace)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        try:
+            # Values that decode but don't fit the field types fail while the
+            # filter is built, or only once it runs
+            if cursor:
+                queryset = queryset.filter(self._seek_filter(self._decode_cursor(cursor)))
+            rows = list(queryset.order_by(*self.ordering)[:self.page_size + 1])
+        except (ValidationError, ValueError, TypeError):
+            raise NotFound('Invalid cursor.')
+        self.has_next = len(rows) > self.page_size
+        self.page     = rows[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        payload = [('next', self.get_next_link()), ('previous', None), ('results', data)]
+        if self.count is not None:
+            payload.insert(0, ('count', self.count))
+        return Response(OrderedDict(payload))
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        last   = self.page[-1]
+        values = [self._value(last, field.lstrip('-')) for field in self.ordering]
+        url    = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self._encode_cursor(values))
+
+    # ── helpers ────────────────────────────────────────────────────────────
+
+    def _get_ordering(self, queryset):
+        query    = queryset.query
+        ordering = [f for f in query.order_by if isinstance(f, str)]
+        if not ordering and query.default_ordering:
+            ordering = list(queryset.model._meta.ordering)
+        ordering = ['-id' if f == '-pk' else 'id' if f == 'pk' else f for f in ordering]
+        if not any(f.lstrip('-') == 'id' for f in ordering):
+            descending = bool(ordering) and ordering[0].startswith('-')
+            ordering.append('-id' if descending else 'id')
+        return ordering
+
+    def _seek_filter(self, values):
+        """(a, b, id) after (va, vb, vid) in the ordering's direction, as a Q."""
+        if len(values) != len(self.ordering):
+            raise NotFound('Invalid cursor.')
+
+        condition = Q()
+        equal     = Q()
+        for field, value in zip(self.ordering, values):
+            name   = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+
+        # Leading range bound keeps the predicate index-friendly
+        first  = self.ordering[0]
+        bound  = 'lte' if first.startswith('-') else 'gte'
+        return Q(**{f'{first.lstrip("-")}__{bound}': values[0]}) & condition
+
+    def _value(self, obj, path):
+        if isinstance(obj, dict):   # .values() rows from a sparse-fieldset projection
+            return obj[path]
+        for attr in path.split('__'):
+            obj = getattr(obj, attr)
+        return obj
+
+    def _encode_cursor(self, values):
+        raw = json.dumps(values, cls=CursorEncoder, separators=(',', ':'))
+        return urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def _decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            values = json.loads(urlsafe_b64decode(padded.encode()).decode())
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound('Invalid cursor.')
+        if not isinstance(values, list):
+            raise NotFound('Invalid cursor.')
+        return values
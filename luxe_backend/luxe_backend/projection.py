@@ -0,0 +1,108 @@
+"""
+Sparse fieldsets for list endpoints.
+
+`?fields=id,name,price` and/or `?expand=category,images` switch a list view
+from its ModelSerializer to a Projection: rows come straight from
+`.values()` and are turned into plain dicts, with no model or serializer
+instances. Without either parameter the view responds exactly as before.
+"""
+from decimal import Decimal
+
+from rest_framework.exceptions import ValidationError
+
+
+def _split(value):
+    return [part.strip() for part in (value or '').split(',') if part.strip()]
+
+
+def _plain(value):
+    # Match the string rendering the serializers' DecimalFields use
+    return str(value) if isinstance(value, Decimal) else value
+
+
+class Projection:
+    """
+    Subclasses declare:
+      fields      — output name -> ORM path, or an expression to annotate
+      relations   — expandable to-one relations: name -> {key: ORM path}, must include 'id'
+      collections — expandable to-many relations, loaded by fetch_<name>(ids) -> {id: [dicts]}
+    """
+    fields      = {}
+    relations   = {}
+    collections = ()
+
+    def __init__(self, fields=None, expand=None, request=None):
+        self.field_names = fields or list(self.fields)
+        self.expand      = expand or []
+        self.request     = request
+
+        unknown_fields = [f for f in self.field_names if f not in self.fields]
+        unknown_expand = [e for e in self.expand if e not in self.relations and e not in self.collections]
+        errors = {}
+        if unknown_fields:
+            errors['fields'] = f'Unknown field(s): {", ".join(unknown_fields)}. Choose from: {", ".join(self.fields)}.'
+        if unknown_expand:
+            choices = list(self.relations) + list(self.collections)
+            errors['expand'] = f'Unknown expansion(s): {", ".join(unknown_expand)}. Choose from: {", ".join(choices)}.'
+        if errors:
+            raise ValidationError(errors)
+
+    @classmethod
+    def from_request(cls, request):
+        """A projection for the request, or None if it asked for the full representation."""
+        params = request.query_params
+        if 'fields' not in params and 'expand' not in params:
+            return None
+        return cls(_split(params.get('fields')), _split(params.get('expand')), request)
+
+    def queryset(self, qs):
+        """Turn `qs` into a values() queryset with just the columns this projection needs."""
+        annotations, self.columns = {}, {}
+        for name in self.field_names:
+            source = self.fields[name]
+            if isinstance(source, str):
+                self.columns[name] = source
+            else:
+                annotations[f'_proj_{name}'] = source
+                self.columns[name] = f'_proj_{name}'
+        for relation in self.expand:
+            for key, path in self.relations.get(relation, {}).items():
+                self.columns[f'{relation}.{key}'] = path
+
+        # Ordering columns are selected too so keyset pagination can read them off each row
+        ordering = [f for f in qs.query.order_by if isinstance(f, str)] or list(qs.model._meta.ordering)
+        keys = {'id', *self.columns.values(), *(f.lstrip('-') for f in ordering)}
+        return qs.prefetch_related(None).annotate(**annotations).values(*keys)
+
+    def render(self, rows):
+        rows = list(rows)
+        ids  = [row['id'] for row in rows]
+        many = {name: getattr(self, f'fetch_{name}')(ids) for name in self.expand if name in self.collections}
+
+        result = []
+        for row in rows:
+            item = {name: _plain(row[self.columns[name]]) for name in self.field_names}
+            for relation in self.expand:
+                if relation in self.relations:
+                    nested = {key: _plain(row[self.columns[f'{relation}.{key}']]) for key in self.relations[relation]}
+                    item[relation] = nested if nested['id'] is not None else None
+                else:
+                    item[relation] = many[relation].get(row['id'], [])
+            result.append(item)
+        return result
+
+
+class SparseFieldsMixin:
+    """ListAPIView mixin that serves ?fields= / ?expand= through `projection_class`."""
+    projection_class = None
+
+    def list(self, request, *args, **kwargs):
+        projection = self.projection_class.from_request(request)
+        if projection is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = projection.queryset(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return self.response_class(projection.render(queryset))
+        return self.get_paginated_response(projection.render(page))
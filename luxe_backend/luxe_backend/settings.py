@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 from datetime import timedelta
+from corsheaders.defaults import default_headers
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -63,6 +64,9 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # A file rather than shared-cache memory, where a locked table fails at
+        # once instead of waiting: the checkout concurrency tests run threads
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
@@ -86,6 +90,27 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# ── Cache ───────────────────────────────────────────────────────────────────
+# The catalog response cache keeps its version counter here, so deployments
+# running several processes should point REDIS_URL at a shared instance.
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get("REDIS_URL"),
+        }
+    }
+else:
+    # Per-process memory: fine for runserver and a single worker. With several
+    # gunicorn workers each keeps its own catalog version, so a write only
+    # invalidates the worker that handled it and the others keep serving stale
+    # pages (as do the cached facets, page counts and shard stock sums).
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # ── REST Framework ──────────────────────────────────────────────────────────
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
@@ -94,7 +119,7 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'luxe_backend.pagination.KeysetPagination',
     'PAGE_SIZE': 12,
 }
 
@@ -113,6 +138,7 @@ CORS_ALLOWED_ORIGINS = [
     'http://127.0.0.1:5173',
 ]
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
 
 import dj_database_url
 
@@ -123,4 +149,20 @@ if os.environ.get("DATABASE_URL"):
 
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
-MIDDLEWARE.insert(1, 'whitenoise.middleware.WhiteNoiseMiddleware')
+# WhiteNoise, extended to serve the content-hashed image derivatives in MEDIA_ROOT
+MIDDLEWARE.insert(1, 'products.middleware.DerivativeWhiteNoiseMiddleware')
+
+# Local directory that stands in for remote product image URLs (offline builds)
+IMAGE_SOURCE_DIR = os.environ.get("IMAGE_SOURCE_DIR") or None
+
+# Idempotency-Key handling (orders.idempotency): how long stored responses are
+# replayed, how long a duplicate waits for the in-flight request, and after how
+# long an unfinished request is presumed dead and may be retried
+IDEMPOTENCY_KEY_TTL      = timedelta(hours=24)
+IDEMPOTENCY_WAIT         = timedelta(seconds=10)
+IDEMPOTENCY_LOCK_TIMEOUT = timedelta(minutes=2)
+
+# Order archival (orders.archive): delivered and cancelled orders older than
+# this move to the archive tables, ORDER_ARCHIVE_BATCH orders per transaction
+ORDER_ARCHIVE_AFTER = timedelta(days=int(os.environ.get("ORDER_ARCHIVE_AFTER_DAYS", 90)))
+ORDER_ARCHIVE_BATCH = 1000
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Order, OrderItem
+from .models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
 
 class OrderItemInline(admin.TabularInline):
     model  = OrderItem
@@ -13,3 +13,22 @@ class OrderAdmin(admin.ModelAdmin):
     search_fields = ('user__username', 'user__email')
     list_editable = ('status',)
     inlines       = [OrderItemInline]
+
+class ArchivedOrderItemInline(admin.TabularInline):
+    model  = ArchivedOrderItem
+    extra  = 0
+    fields = ('name', 'price', 'quantity')
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(admin.ModelAdmin):
+    """Read-only: archived orders are final (see orders.archive)."""
+    list_display  = ('id', 'user', 'status', 'total', 'created_at', 'archived_at')
+    list_filter   = ('status',)
+    search_fields = ('user__username', 'user__email')
+    inlines       = [ArchivedOrderItemInline]
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
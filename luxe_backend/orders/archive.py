@@ -0,0 +1,201 @@
+"""
+Hot/cold order storage.
+
+archive_orders() moves delivered and cancelled orders older than
+ORDER_ARCHIVE_AFTER, with their items, from Order / OrderItem into
+ArchivedOrder / ArchivedOrderItem, keeping their ids. Each batch of
+ORDER_ARCHIVE_BATCH orders is its own short transaction: INSERT ... SELECT
+... RETURNING id (SQLite 3.35+ / PostgreSQL) copies the orders, then the
+items, then plain DELETEs remove the originals. Nothing is deleted through
+the ORM, so the rollup and counter signals do not fire: archived orders
+still count towards revenue, the daily rollups and the dashboard's order
+total.
+
+Reads go through spanning(): while a list's date range starts after the
+newest archived order, it is served by the hot table alone; otherwise an
+ArchiveUnion merges both tables in the list's ordering.
+"""
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import IntegerField, Max, Value
+from django.utils import timezone
+
+from .models import ArchivedOrder, ArchivedOrderItem, CheckoutTicket, Order, OrderItem
+
+ARCHIVE_STATUSES = ('delivered', 'cancelled')
+
+ORDER_COLUMNS = ('id', 'user_id', 'status', 'total', 'created_at', 'updated_at')
+ITEM_COLUMNS  = ('id', 'order_id', 'product_id', 'name', 'price', 'quantity')
+
+
+# ── Moving orders ───────────────────────────────────────────────────────────
+
+def _in(ids):
+    return '(' + ', '.join(['%s'] * len(ids)) + ')'
+
+
+def archive_batch(cutoff, batch_size=None):
+    """Archive up to `batch_size` of the oldest-id final orders placed before `cutoff`. Returns how many moved."""
+    batch_size = batch_size or settings.ORDER_ARCHIVE_BATCH
+    candidates = Order.objects.filter(status__in=ARCHIVE_STATUSES, created_at__lt=cutoff).order_by('id').values('id')
+    if connection.features.has_select_for_update_skip_locked:
+        # Leave orders an admin is editing right now for the next run
+        candidates = candidates.select_for_update(skip_locked=True)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        # First statement is the write, so SQLite takes its write lock up front
+        subquery, params = candidates[:batch_size].query.sql_with_params()
+        columns = ', '.join(ORDER_COLUMNS)
+        cursor.execute(
+            f'INSERT INTO {ArchivedOrder._meta.db_table} ({columns}, archived_at) '
+            f'SELECT {columns}, %s FROM {Order._meta.db_table} WHERE id IN ({subquery}) RETURNING id',
+            [connection.ops.adapt_datetimefield_value(timezone.now()), *params],
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+        if not ids:
+            return 0
+
+        columns = ', '.join(ITEM_COLUMNS)
+        cursor.execute(
+            f'INSERT INTO {ArchivedOrderItem._meta.db_table} ({columns}) '
+            f'SELECT {columns} FROM {OrderItem._meta.db_table} WHERE order_id IN {_in(ids)}',
+            ids,
+        )
+        CheckoutTicket.objects.filter(order_id__in=ids).update(order=None)
+        cursor.execute(f'DELETE FROM {OrderItem._meta.db_table} WHERE order_id IN {_in(ids)}', ids)
+        cursor.execute(f'DELETE FROM {Order._meta.db_table} WHERE id IN {_in(ids)}', ids)
+    return len(ids)
+
+
+def archive_orders(older_than=None, batch_size=None, limit=None, pause=None):
+    """
+    Archive every final order placed more than `older_than` (default
+    ORDER_ARCHIVE_AFTER) ago, in batches, up to `limit` orders. `pause()`
+    is called between batches. Returns the number archived.
+    """
+    cutoff     = timezone.now() - (settings.ORDER_ARCHIVE_AFTER if older_than is None else older_than)
+    batch_size = batch_size or settings.ORDER_ARCHIVE_BATCH
+    moved      = 0
+    while limit is None or moved < limit:
+        size   = batch_size if limit is None else min(batch_size, limit - moved)
+        done   = archive_batch(cutoff, size)
+        moved += done
+        if done < size:
+            break
+        if pause:
+            pause()
+    return moved
+
+
+# ── Reading across both tables ──────────────────────────────────────────────
+
+def archive_horizon():
+    """created_at of the newest archived order (an index lookup), or None while the archive is empty."""
+    return ArchivedOrder.objects.aggregate(newest=Max('created_at'))['newest']
+
+
+def needs_archive(start=None, status=None):
+    """Whether orders placed from `start` on (None = all time) with `status` (None = any) may be archived."""
+    if status is not None and status not in ARCHIVE_STATUSES:
+        return False
+    horizon = archive_horizon()
+    return horizon is not None and (start is None or start <= horizon)
+
+
+def spanning(build, start=None, status=None):
+    """
+    `build(Order.objects)`, or an ArchiveUnion with `build(ArchivedOrder.objects)`
+    when the read reaches the archive. `build` applies the same filters to both,
+    which share their field names.
+    """
+    hot = build(Order.objects)
+    if not needs_archive(start, status):
+        return hot
+    return ArchiveUnion(hot, build(ArchivedOrder.objects))
+
+
+def _pk(row):
+    return row['id'] if isinstance(row, dict) else row.id
+
+
+class ArchiveUnion:
+    """
+    A hot and an archived order queryset read as one, for the list views and
+    their pagination. Chained calls (filter, order_by, values, ...) apply to
+    both sides. Slicing runs one UNION ALL of just the ordering columns,
+    ordered and limited, then loads the rows it picked from each table.
+    """
+    model   = Order
+    ordered = True
+
+    def __init__(self, hot, cold, ordering=None):
+        self.hot  = hot
+        self.cold = cold
+        ordering  = list(ordering or hot.query.order_by or Order._meta.ordering)
+        if not any(field.lstrip('-') == 'id' for field in ordering):
+            ordering.append('-id' if ordering[0].startswith('-') else 'id')   # stable merge
+        self.ordering = ordering
+
+    def _chain(self, method, *args, **kwargs):
+        return ArchiveUnion(getattr(self.hot, method)(*args, **kwargs),
+                            getattr(self.cold, method)(*args, **kwargs), self.ordering)
+
+    def filter(self, *args, **kwargs):
+        return self._chain('filter', *args, **kwargs)
+
+    def annotate(self, *args, **kwargs):
+        return self._chain('annotate', *args, **kwargs)
+
+    def values(self, *fields):
+        return self._chain('values', *fields)
+
+    def select_related(self, *fields):
+        return self._chain('select_related', *fields)
+
+    def prefetch_related(self, *lookups):
+        return self._chain('prefetch_related', *lookups)
+
+    def all(self):
+        return self._chain('all')
+
+    def order_by(self, *fields):
+        return ArchiveUnion(self.hot.order_by(*fields), self.cold.order_by(*fields), fields)
+
+    def keys(self, stop=None):
+        """
+        UNION ALL of both sides' ordering columns plus an `_archived` flag, in order.
+        Where the backend allows it each side is ordered and cut to `stop` rows
+        first; SQLite merges index-ordered sides by itself.
+        """
+        names = [field.lstrip('-') for field in self.ordering]
+        sides = []
+        for archived, qs in ((0, self.hot), (1, self.cold)):
+            qs = qs.order_by().values(*names).annotate(_archived=Value(archived, output_field=IntegerField()))
+            if stop is not None and connection.features.supports_slicing_ordering_in_compound:
+                qs = qs.order_by(*self.ordering)[:stop]
+            sides.append(qs)
+        return sides[0].union(sides[1], all=True).order_by(*self.ordering)
+
+    @property
+    def query(self):
+        return self.keys().query
+
+    def count(self):
+        return self.hot.count() + self.cold.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        keys  = list(self.keys(index.stop)[index])
+        found = {}
+        for archived, qs in ((0, self.hot), (1, self.cold)):
+            ids = [key['id'] for key in keys if key['_archived'] == archived]
+            if ids:
+                found.update({(archived, _pk(row)): row for row in qs.filter(id__in=ids)})
+        return [found[key['_archived'], key['id']] for key in keys]
@@ -0,0 +1,98 @@
+"""
+Bulk order status transitions for fulfilment.
+
+transition_orders() moves a set of orders from one status to the next with
+a single guarded UPDATE ... WHERE status = <expected> RETURNING id (SQLite
+3.35+ / PostgreSQL). Orders a concurrent request already moved no longer
+match and are skipped, never overwritten, and only the rows this statement
+changed are restocked and re-counted. A cancellation puts its units back
+with one UPDATE across every plain product (one shard write per sharded
+product). UPDATE sends no signals, so the sales rollups, catalog cache and
+facets are brought up to date here.
+"""
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.utils import timezone
+
+from products.cache import bump_catalog_version
+from products.facets import invalidate_unfiltered_facets
+from products.inventory import put_stock
+from products.models import Product
+from .models import Order, OrderItem
+from .rollups import statuses_changed
+
+# Allowed moves; delivered and cancelled orders are final
+TRANSITIONS = {
+    'pending':   ('confirmed', 'cancelled'),
+    'confirmed': ('shipped', 'cancelled'),
+    'shipped':   ('delivered',),
+}
+CHUNK_SIZE = 1000   # order ids per follow-up query
+
+
+def _chunks(ids):
+    for start in range(0, len(ids), CHUNK_SIZE):
+        yield ids[start:start + CHUNK_SIZE]
+
+
+def _move(orders, from_status, to_status):
+    """The guarded UPDATE of `orders` (a queryset); returns the ids it changed."""
+    subquery, params = orders.order_by().values('id').query.sql_with_params()
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {Order._meta.db_table} SET status = %s, updated_at = %s '
+            f'WHERE status = %s AND id IN ({subquery}) RETURNING id',
+            [to_status, now, from_status, *params],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _restock(order_ids):
+    """Put the items of the given orders back in stock. Returns (units, whether any product came back on sale)."""
+    quantities = Counter()
+    for chunk in _chunks(order_ids):
+        quantities.update(dict(
+            OrderItem.objects.filter(order_id__in=chunk, product__isnull=False).order_by()
+                             .values('product_id').annotate(units=Sum('quantity')).values_list('product_id', 'units')
+        ))
+    shards   = dict(Product.objects.filter(id__in=quantities.keys()).values_list('id', 'stock_shards'))
+    reopened = False
+    for pid in sorted(pid for pid, count in shards.items() if count):
+        reopened |= put_stock(pid, shards[pid], quantities[pid])
+
+    plain = {pid: quantities[pid] for pid, count in shards.items() if not count}
+    if plain:
+        returned = Case(*[When(id=pid, then=Value(qty)) for pid, qty in plain.items()], output_field=IntegerField())
+        reopened |= Product.objects.filter(id__in=plain.keys(), stock=0, is_available=False).exists()
+        # One statement for every product; a sold-out product goes back on sale
+        Product.objects.filter(id__in=plain.keys()).update(
+            stock=F('stock') + returned,
+            is_available=Case(When(stock=0, then=Value(True)), default=F('is_available')),
+        )
+    return sum(quantities[pid] for pid in shards), reopened
+
+
+def transition_orders(orders, from_status, to_status):
+    """
+    Move the orders in `orders` that are still `from_status` to `to_status`.
+    Returns {'transitioned': n, 'restocked_units': n}.
+    """
+    if to_status not in TRANSITIONS.get(from_status, ()):
+        raise ValueError(f'Orders cannot go from {from_status} to {to_status}.')
+
+    with transaction.atomic():
+        ids      = _move(orders, from_status, to_status)   # first statement is the write (SQLite lock)
+        restored = 0
+        if ids and to_status == 'cancelled':
+            restored, reopened = _restock(ids)
+            if restored:
+                bump_catalog_version()
+            if reopened:
+                invalidate_unfiltered_facets()
+        for chunk in _chunks(ids):
+            moved = list(Order.objects.filter(id__in=chunk).only('id', 'status', 'total', 'created_at'))
+            statuses_changed(moved, from_status)
+    return {'transitioned': len(ids), 'restocked_units': restored}
@@ -0,0 +1,168 @@
+"""
+Idempotency-Key support for POST endpoints.
+
+A client that may retry a request (mobile apps on flaky networks) sends a
+unique `Idempotency-Key` header. The first request with a key claims an
+IdempotencyKey row and runs; its response is saved in the same transaction
+as the view's own writes, so either both the work and the stored response
+commit or neither does. A repeat of the key:
+
+  - with the same request    → the stored response is replayed, nothing reruns
+  - while the first is still running → waits up to IDEMPOTENCY_WAIT for it,
+                                 then replays its response (or 409)
+  - with a different request → 422
+
+Server errors and exceptions (including DRF validation errors raised
+from the view) are not stored, so a retry after one runs again. Keys
+expire after IDEMPOTENCY_KEY_TTL (see purge_idempotency_keys).
+"""
+import hashlib
+import hmac
+import json
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER       = 'Idempotency-Key'
+MAX_KEY_LEN  = 255
+POLL_SECONDS = 0.1
+
+
+def request_fingerprint(request):
+    """Keyed hash of method, path and body, so reusing a key for another request is caught."""
+    body = json.dumps(request.data, sort_keys=True, default=str, separators=(',', ':'))
+    message = f'{request.method}\n{request.path}\n{body}'.encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+
+def idempotent(exclude=(), on_replay=None):
+    """
+    Decorate an APIView handler to honour Idempotency-Key. `exclude` lists
+    top-level response keys that must not be stored (e.g. tokens);
+    `on_replay(data)` can rebuild them when a stored response is replayed.
+    """
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            key = request.headers.get(HEADER)
+            if key is None:
+                return handler(view, request, *args, **kwargs)
+            if not key or len(key) > MAX_KEY_LEN:
+                return Response(
+                    {'detail': f'{HEADER} must be 1-{MAX_KEY_LEN} characters.'},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            scope       = f'user:{request.user.pk}' if request.user.is_authenticated else 'anonymous'
+            fingerprint = request_fingerprint(request)
+            record      = _claim(scope, key, fingerprint)
+
+            if record.request_hash != fingerprint:
+                return Response(
+                    {'detail': f'This {HEADER} was already used for a different request.'},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            if not record.claimed:
+                record = _wait_for(record)
+                if record is None:
+                    response = Response(
+                        {'detail': f'A request with this {HEADER} is still in progress.'},
+                        status=status.HTTP_409_CONFLICT,
+                    )
+                    response['Retry-After'] = '1'
+                    return response
+                if record.status == 'completed':
+                    return _replay(record, on_replay)
+                # claimed it from a request that died
+
+            try:
+                with transaction.atomic():
+                    # Writing the key row first holds it for the whole request (and, on
+                    # SQLite, takes the write lock before the view reads anything)
+                    IdempotencyKey.objects.filter(pk=record.pk).update(updated_at=timezone.now())
+                    response = handler(view, request, *args, **kwargs)
+                    if response.status_code >= 500:
+                        raise _ServerError(response)
+                    body = {k: v for k, v in response.data.items() if k not in exclude} \
+                        if isinstance(response.data, dict) else response.data
+                    IdempotencyKey.objects.filter(pk=record.pk).update(
+                        status='completed', response_code=response.status_code,
+                        response_body=body, updated_at=timezone.now(),
+                    )
+            except _ServerError as exc:
+                IdempotencyKey.objects.filter(pk=record.pk).delete()
+                return exc.response
+            except Exception:
+                IdempotencyKey.objects.filter(pk=record.pk).delete()
+                raise
+            return response
+        return wrapper
+    return decorator
+
+
+class _ServerError(Exception):
+    def __init__(self, response):
+        super().__init__(response.status_code)
+        self.response = response
+
+
+def _claim(scope, key, fingerprint):
+    """The key's row, with `claimed` set if this request inserted it."""
+    try:
+        with transaction.atomic():
+            record = IdempotencyKey.objects.create(scope=scope, key=key, request_hash=fingerprint)
+        record.claimed = True
+    except IntegrityError:
+        record = IdempotencyKey.objects.get(scope=scope, key=key)
+        record.claimed = False
+        if record.status == 'completed' and record.created_at < timezone.now() - settings.IDEMPOTENCY_KEY_TTL:
+            # Expired but not yet purged: start over under the same key
+            record.delete()
+            return _claim(scope, key, fingerprint)
+    return record
+
+
+def _wait_for(record):
+    """
+    Poll until the in-flight request completes. Returns the completed row, the
+    row claimed for this request if the original holder died, or None on timeout.
+    """
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT.total_seconds()
+    while True:
+        try:
+            record = IdempotencyKey.objects.get(pk=record.pk)
+        except IdempotencyKey.DoesNotExist:
+            # The original failed with a server error and released the key; try again
+            return _claim_released(record)
+        if record.status == 'completed':
+            return record
+
+        stale = timezone.now() - settings.IDEMPOTENCY_LOCK_TIMEOUT
+        if IdempotencyKey.objects.filter(pk=record.pk, status='in_progress', updated_at__lt=stale) \
+                                 .update(updated_at=timezone.now()):
+            record.claimed = True
+            return record
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(POLL_SECONDS)
+
+
+def _claim_released(record):
+    record = _claim(record.scope, record.key, record.request_hash)
+    return record if record.claimed or record.status == 'completed' else _wait_for(record)
+
+
+def _replay(record, on_replay):
+    data = record.response_body
+    if on_replay is not None:
+        data = on_replay(data)
+    response = Response(data, status=record.response_code)
+    response['Idempotent-Replayed'] = 'true'
+    return response
@@ -0,0 +1,127 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from orders.models import Order, OrderItem
+from orders.views import AdminOrderListView
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a large order history (1M orders by default) in a rolled-back transaction and '
+        'time GET /api/admin/orders/ for the admin screen\'s filters: date range, status, '
+        'username/email prefix search and ?fields=. "first" is the cold request (it also pays '
+        'for the page count, which is then cached); p50/p95 cover the warm ones. Fails if any '
+        'case\'s p95 exceeds --target.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=1_000_000)
+        parser.add_argument('--users', type=int, default=10_000)
+        parser.add_argument('--days', type=int, default=730, help='Spread the orders over this many days')
+        parser.add_argument('--repeat', type=int, default=20, help='Requests per case')
+        parser.add_argument('--target', type=float, default=250.0, help='p95 budget per case, in ms')
+
+    def handle(self, *args, **opts):
+        failures = []
+        try:
+            with transaction.atomic():
+                started = time.monotonic()
+                admin   = self._seed(opts)
+                self.stdout.write(f'  seeded {opts["orders"]:,} orders in {time.monotonic() - started:.1f}s\n')
+
+                self.stdout.write(f'  {"case":<34}  {"first":>9}  {"p50":>9}  {"p95":>9}')
+                for label, params in self._cases(opts):
+                    first, p50, p95 = self._time(admin, params, opts['repeat'])
+                    over = p95 > opts['target']
+                    line = f'  {label:<34}  {first:>7.1f}ms  {p50:>7.1f}ms  {p95:>7.1f}ms'
+                    self.stdout.write(self.style.ERROR(line) if over else line)
+                    if over:
+                        failures.append(label)
+                raise Rollback
+        except Rollback:
+            pass   # always roll back the seed data
+
+        if failures:
+            raise CommandError(f'p95 over {opts["target"]:.0f}ms: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS(f'\n✓ Every admin order list case has p95 under {opts["target"]:.0f}ms'))
+
+    # ── cases ───────────────────────────────────────────────────────────────
+
+    def _cases(self, opts):
+        today = timezone.localdate()
+        month = {'from': str(today - timedelta(days=30)), 'to': str(today)}
+        old   = {'from': str(today - timedelta(days=opts['days'] - 7)),
+                 'to':   str(today - timedelta(days=opts['days'] - 14))}
+        yield 'default', {}
+        yield 'status=shipped', {'status': 'shipped'}
+        yield 'last 30 days', month
+        yield 'one week, two years back', old
+        yield 'status + last 30 days', {'status': 'delivered', **month}
+        yield 'search username prefix', {'search': 'bench-user-42'}
+        yield 'search email prefix', {'search': 'buyer42@'}
+        yield 'user filter', {'user': 'bench-user-7'}
+        yield 'fields=id,status,total,created_at', {'fields': 'id,status,total,created_at'}
+        yield 'keyset cursor', {'cursor': ''}
+
+    def _time(self, admin, params, repeat):
+        view    = AdminOrderListView.as_view()
+        timings = []
+        for _ in range(repeat):
+            request = APIRequestFactory().get('/api/admin/orders/', params)
+            force_authenticate(request, user=admin)
+            started  = time.perf_counter()
+            response = view(request)
+            response.render()
+            timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f'{params}: HTTP {response.status_code} {response.content[:200]!r}')
+        first, warm = timings[0], timings[1:] or timings
+        p95 = statistics.quantiles(warm, n=20)[-1] if len(warm) > 1 else warm[0]
+        return first, statistics.median(warm), p95
+
+    # ── seed data ───────────────────────────────────────────────────────────
+
+    def _seed(self, opts):
+        rng   = random.Random(42)
+        admin = User.objects.create_user(username='bench-admin', password=None, is_staff=True)
+        User.objects.bulk_create(
+            [User(username=f'bench-user-{i}', email=f'buyer{i}@example.com') for i in range(opts['users'])],
+            batch_size=1000,
+        )
+        users    = list(User.objects.filter(username__startswith='bench-user-').values_list('id', flat=True))
+        statuses = [choice for choice, _ in Order.STATUS_CHOICES]
+        now      = timezone.now()
+        chunk    = 1000
+        chunks   = max(opts['orders'] // chunk, 1)
+        last_id  = Order.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+        for n in range(chunks):
+            Order.objects.bulk_create([
+                Order(user_id=rng.choice(users), status=rng.choice(statuses), total=Decimal(rng.randint(100, 200000)))
+                for _ in range(chunk)
+            ])
+            # created_at is auto_now_add, so each chunk is backdated in place, oldest first
+            created = now - timedelta(days=opts['days']) * (1 - n / chunks)
+            new_ids = list(Order.objects.filter(id__gt=last_id).order_by('id').values_list('id', 'total'))
+            Order.objects.filter(id__gt=last_id).update(created_at=created, updated_at=created)
+            OrderItem.objects.bulk_create([
+                OrderItem(order_id=order_id, name='Bench Product', price=total, quantity=1)
+                for order_id, total in new_ids
+            ])
+            last_id = new_ids[-1][0]
+        return admin
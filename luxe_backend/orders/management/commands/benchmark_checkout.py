@@ -0,0 +1,77 @@
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from cart.models import Cart, CartItem
+from orders.views import CheckoutView
+from products.inventory import enable_sharding
+from products.models import Product
+
+User = get_user_model()
+
+# A private cache, so the checkouts' catalog invalidations leave the site's cache alone
+BENCHMARK_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                'LOCATION': 'benchmark-checkout'}}
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Time sequential checkouts of carts holding the same products, in a rolled-back '
+        'transaction. --shards runs them against sharded stock counters. The concurrency '
+        '(oversell) checks live in orders/tests.py.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=200, help='Checkouts to time')
+        parser.add_argument('--lines', type=int, default=3, help='Products per cart')
+        parser.add_argument('--shards', type=int, default=0, help='Stock shards per product (0 = plain stock)')
+
+    def handle(self, *args, **opts):
+        try:
+            with override_settings(CACHES=BENCHMARK_CACHES), transaction.atomic():
+                users   = self._seed(opts)
+                view    = CheckoutView.as_view()
+                started = time.monotonic()
+                for user in users:
+                    request = APIRequestFactory().post('/api/orders/checkout/', {}, format='json')
+                    force_authenticate(request, user=user)
+                    if view(request).status_code != 201:
+                        raise CommandError('A checkout failed during the run')
+                elapsed = time.monotonic() - started
+                raise Rollback
+        except Rollback:
+            pass   # always roll back the seed data
+
+        self.stdout.write(
+            f'  {len(users)} sequential checkouts of {opts["lines"]} line(s) in '
+            f'{elapsed:.2f}s ({len(users) / elapsed:,.0f} orders/s)'
+        )
+        self.stdout.write(self.style.SUCCESS('\n✓ Benchmarked checkout'))
+
+    def _seed(self, opts):
+        products = [
+            Product.objects.create(name=f'Bench Product {i}', description='seeded', price=Decimal('10.00'),
+                                   stock=10 ** 6)
+            for i in range(opts['lines'])
+        ]
+        if opts['shards']:
+            for product in products:
+                enable_sharding(product.id, opts['shards'])
+
+        User.objects.bulk_create([User(username=f'bench-checkout-{i}') for i in range(opts['orders'])])
+        users = list(User.objects.filter(username__startswith='bench-checkout-'))
+        Cart.objects.bulk_create([Cart(user=user) for user in users])
+        CartItem.objects.bulk_create([
+            CartItem(cart=cart, product=product, quantity=1)
+            for cart in Cart.objects.filter(user__in=users) for product in products
+        ])
+        return users
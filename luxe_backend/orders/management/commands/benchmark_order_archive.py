@@ -0,0 +1,152 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from orders.archive import archive_orders
+from orders.models import ArchivedOrder, Order, OrderItem
+from orders.views import AdminOrderListView, UserOrderListView
+
+User = get_user_model()
+
+# A private cache, so each round's first request pays for its page count again
+# without flushing the site's cache
+BENCHMARK_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                'LOCATION': 'benchmark-order-archive'}}
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a large order history (1M orders over two years by default, mostly delivered or '
+        'cancelled once old) in a rolled-back transaction, time the order list endpoints, '
+        'archive everything older than ORDER_ARCHIVE_AFTER and time them again. Recent ranges '
+        'should get faster (the hot table shrinks); ranges that reach the archive show the cost '
+        'of reading across both tables.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=1_000_000)
+        parser.add_argument('--users', type=int, default=10_000)
+        parser.add_argument('--days', type=int, default=730, help='Spread the orders over this many days')
+        parser.add_argument('--repeat', type=int, default=20, help='Requests per case')
+
+    def handle(self, *args, **opts):
+        try:
+            with override_settings(CACHES=BENCHMARK_CACHES), transaction.atomic():
+                started = time.monotonic()
+                admin, customer = self._seed(opts)
+                self.stdout.write(f'  seeded {opts["orders"]:,} orders in {time.monotonic() - started:.1f}s')
+                before = self._run(admin, customer, opts)
+
+                started = time.monotonic()
+                moved   = archive_orders()
+                self.stdout.write(
+                    f'  archived {moved:,} orders in {time.monotonic() - started:.1f}s; '
+                    f'{Order.objects.count():,} left in the hot table\n'
+                )
+                after = self._run(admin, customer, opts)
+                raise Rollback
+        except Rollback:
+            pass   # always roll back the seed data
+
+        self.stdout.write(f'  {"case":<34}  {"first":>19}  {"p50":>19}  {"p95":>19}   (before → after archival)')
+        for label in before:
+            columns = [f'{b:>7.1f} → {a:>7.1f}ms' for b, a in zip(before[label], after[label])]
+            self.stdout.write(f'  {label:<34}  ' + '  '.join(columns))
+        if not moved:
+            raise CommandError('Nothing was archived; check ORDER_ARCHIVE_AFTER against --days.')
+        self.stdout.write(self.style.SUCCESS(f'\n✓ Benchmarked {len(before)} order list cases around archival'))
+
+    # ── cases ───────────────────────────────────────────────────────────────
+
+    def _cases(self, admin, customer, opts):
+        today = timezone.localdate()
+        week  = {'from': str(today - timedelta(days=7)), 'to': str(today)}
+        month = {'from': str(today - timedelta(days=30)), 'to': str(today)}
+        old   = {'from': str(today - timedelta(days=opts['days'] - 7)),
+                 'to':   str(today - timedelta(days=opts['days'] - 14))}
+        yield 'admin: last 7 days', AdminOrderListView, admin, week
+        yield 'admin: last 30 days', AdminOrderListView, admin, month
+        yield 'admin: status=shipped', AdminOrderListView, admin, {'status': 'shipped'}
+        yield 'admin: search + last 30 days', AdminOrderListView, admin, {'search': 'bench-user-42', **month}
+        yield 'admin: keyset, last 30 days', AdminOrderListView, admin, {'cursor': '', **month}
+        yield 'admin: default (all time)', AdminOrderListView, admin, {}
+        yield 'admin: one week, two years back', AdminOrderListView, admin, old
+        yield 'user history: last 30 days', UserOrderListView, customer, month
+        yield 'user history: all time', UserOrderListView, customer, {}
+
+    def _run(self, admin, customer, opts):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        cache.clear()
+        return {label: self._time(view_cls, user, params, opts['repeat'])
+                for label, view_cls, user, params in self._cases(admin, customer, opts)}
+
+    def _time(self, view_cls, user, params, repeat):
+        view    = view_cls.as_view()
+        timings = []
+        for _ in range(repeat):
+            request = APIRequestFactory().get('/api/orders/', params)
+            force_authenticate(request, user=user)
+            started  = time.perf_counter()
+            response = view(request)
+            response.render()
+            timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f'{params}: HTTP {response.status_code} {response.content[:200]!r}')
+        first, warm = timings[0], timings[1:] or timings
+        p95 = statistics.quantiles(warm, n=20)[-1] if len(warm) > 1 else warm[0]
+        return first, statistics.median(warm), p95
+
+    # ── seed data ───────────────────────────────────────────────────────────
+
+    def _status(self, rng, age):
+        if age < settings.ORDER_ARCHIVE_AFTER:
+            return rng.choice(['pending', 'confirmed', 'shipped', 'delivered', 'cancelled'])
+        # Old orders have almost all run their course
+        return rng.choices(['delivered', 'cancelled', 'shipped'], weights=[88, 10, 2])[0]
+
+    def _seed(self, opts):
+        rng   = random.Random(42)
+        admin = User.objects.create_user(username='bench-admin', password=None, is_staff=True)
+        User.objects.bulk_create(
+            [User(username=f'bench-user-{i}', email=f'buyer{i}@example.com') for i in range(opts['users'])],
+            batch_size=1000,
+        )
+        users    = list(User.objects.filter(username__startswith='bench-user-').values_list('id', flat=True))
+        now      = timezone.now()
+        chunk    = 1000
+        chunks   = max(opts['orders'] // chunk, 1)
+        last_id  = max(Order.objects.order_by('-id').values_list('id', flat=True).first() or 0,
+                       ArchivedOrder.objects.order_by('-id').values_list('id', flat=True).first() or 0)
+
+        for n in range(chunks):
+            created = now - timedelta(days=opts['days']) * (1 - n / chunks)
+            Order.objects.bulk_create([
+                Order(user_id=rng.choice(users), status=self._status(rng, now - created),
+                      total=Decimal(rng.randint(100, 200000)))
+                for _ in range(chunk)
+            ])
+            # created_at is auto_now_add, so each chunk is backdated in place, oldest first
+            new_ids = list(Order.objects.filter(id__gt=last_id).order_by('id').values_list('id', 'total'))
+            Order.objects.filter(id__gt=last_id).update(created_at=created, updated_at=created)
+            OrderItem.objects.bulk_create([
+                OrderItem(order_id=order_id, name='Bench Product', price=total, quantity=1)
+                for order_id, total in new_ids
+            ])
+            last_id = new_ids[-1][0]
+        return admin, User.objects.get(username='bench-user-42')
@@ -0,0 +1,164 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.views import AdminUserListView
+from orders.archive import ArchiveUnion, archive_orders
+from orders.models import DailyProductSales, DailySales, Order
+from orders.views import UserOrderListView, AdminOrderListView
+from products.models import Category, Product
+from products.views import ProductListView
+
+User = get_user_model()
+
+
+class PlanRegression(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'EXPLAIN the hot catalog/order/admin querysets against a seeded dataset and '
+        'fail if any of them falls back to a full table scan. Runs in a rolled-back '
+        'transaction, so it is safe against a real database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000, help='Products and orders to seed')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every plan')
+
+    def handle(self, *args, **opts):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f'Unsupported database backend: {connection.vendor}')
+
+        failures = []
+        try:
+            with transaction.atomic():
+                admin, customer, product = self._seed(opts['rows'])
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+                    if connection.vendor == 'postgresql':
+                        # Ask whether an index *can* serve the query, independent of table size
+                        cursor.execute('SET LOCAL enable_seqscan = off')
+
+                for label, qs in self._cases(admin, customer, product):
+                    plan = qs.explain()
+                    scans = self._full_scans(plan)
+                    status = self.style.ERROR('FULL SCAN') if scans else self.style.SUCCESS('ok')
+                    self.stdout.write(f'  [{status}] {label}')
+                    if scans or opts['verbose_plans']:
+                        self.stdout.write('      ' + plan.replace('\n', '\n      '))
+                    if scans:
+                        failures.append(label)
+                raise PlanRegression
+        except PlanRegression:
+            pass   # always roll back the seed data
+
+        if failures:
+            raise CommandError(f'{len(failures)} queryset(s) fall back to a full scan: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS('\n✓ All query plans use indexes'))
+
+    # ── cases ───────────────────────────────────────────────────────────────
+
+    def _cases(self, admin, customer, product):
+        today = timezone.localdate()
+        yield 'products: default listing', self._view_qs(ProductListView, '/api/products/')
+        yield 'products: category + price range', self._view_qs(
+            ProductListView, '/api/products/', category='cat-1', min_price=100, max_price=5000)
+        yield 'products: ordering=price', self._view_qs(ProductListView, '/api/products/', ordering='price')
+        yield 'orders: user history', self._view_qs(UserOrderListView, '/api/orders/', user=customer)
+        yield 'admin orders: default', self._view_qs(AdminOrderListView, '/api/admin/orders/', user=admin)
+        yield 'admin orders: status filter', self._view_qs(
+            AdminOrderListView, '/api/admin/orders/', user=admin, status='shipped')
+        yield 'admin orders: date range', self._view_qs(
+            AdminOrderListView, '/api/admin/orders/', user=admin, **{'from': '2024-01-01', 'to': '2024-01-31'})
+        yield 'admin orders: search prefix', self._view_qs(
+            AdminOrderListView, '/api/admin/orders/', user=admin, search='plan-user-1')
+        yield 'admin orders: last 30 days (hot table only)', self._view_qs(
+            AdminOrderListView, '/api/admin/orders/', user=admin, **{'from': str(today - timedelta(days=30))})
+        yield 'admin users: default', self._view_qs(AdminUserListView, '/api/admin/users/', user=admin)
+        yield 'admin analytics: daily sales', DailySales.objects.filter(day__gte=today - timedelta(days=30))
+        yield 'admin analytics: one product', DailyProductSales.objects.filter(
+            product_id=product.id, day__gte=today - timedelta(days=30))
+
+    def _view_qs(self, view_cls, path, user=None, **params):
+        """The first page of a list view's queryset, built exactly as the view builds it."""
+        request = APIRequestFactory().get(path, params)
+        if user is not None:
+            force_authenticate(request, user=user)
+        view = view_cls()
+        view.args, view.kwargs, view.format_kwarg = (), {}, None
+        view.request = view.initialize_request(request)
+        qs   = view.filter_queryset(view.get_queryset())
+        size = view.paginator.get_page_size(view.request) or 12
+        if isinstance(qs, ArchiveUnion):
+            return qs.keys(size)[:size]   # the UNION that picks the page across hot and archived orders
+        return qs[:size]
+
+    def _full_scans(self, plan):
+        scans = []
+        for line in plan.splitlines():
+            text = line.strip()
+            if connection.vendor == 'sqlite':
+                # "SCAN products_product" is a table scan; "SCAN ... USING INDEX" walks an index
+                detail = text.split(' ', 3)[-1] if text[:1].isdigit() else text
+                if detail.startswith('SCAN ') and ' USING ' not in detail:
+                    scans.append(detail)
+            elif 'Seq Scan' in text:
+                scans.append(text)
+        return scans
+
+    # ── seed data ───────────────────────────────────────────────────────────
+
+    def _seed(self, rows):
+        rng        = random.Random(42)
+        now        = timezone.now()
+        Category.objects.bulk_create(
+            [Category(name=f'Plan Category {i}', slug=f'cat-{i}') for i in range(10)]
+        )
+        categories = list(Category.objects.filter(slug__startswith='cat-'))
+        Product.objects.bulk_create([
+            Product(
+                name=f'Plan Product {i}', description='seeded', price=Decimal(rng.randint(100, 200000)),
+                category=rng.choice(categories), stock=rng.randint(0, 20), is_available=rng.random() > 0.2,
+            )
+            for i in range(rows)
+        ], batch_size=1000)
+
+        admin = User.objects.create_user(username='plan-admin', password=None, is_staff=True)
+        User.objects.bulk_create(
+            [User(username=f'plan-user-{i}', date_joined=now - timedelta(days=i)) for i in range(max(rows // 10, 10))],
+            batch_size=1000,
+        )
+        users    = list(User.objects.filter(username__startswith='plan-user-'))
+        statuses = [choice for choice, _ in Order.STATUS_CHOICES]
+        Order.objects.bulk_create([
+            Order(user=rng.choice(users), status=rng.choice(statuses), total=Decimal(rng.randint(100, 200000)))
+            for _ in range(rows)
+        ], batch_size=1000)
+        # Half of them a year old and delivered, then archived, so the order lists read both tables
+        old = Order.objects.filter(user__in=users).order_by('id').values_list('id', flat=True)[:rows // 2]
+        Order.objects.filter(id__in=list(old)).update(status='delivered', created_at=now - timedelta(days=365))
+        archive_orders()
+
+        # Two years of rollups, so the analytics plans are judged against realistic row counts
+        today    = timezone.localdate()
+        days     = [today - timedelta(days=n) for n in range(730)]
+        products = list(Product.objects.filter(name__startswith='Plan Product ').order_by('id')[:50])
+        DailySales.objects.bulk_create([
+            DailySales(day=day, units=rng.randint(1, 50), revenue=Decimal(rng.randint(100, 200000)),
+                       orders=rng.randint(1, 20))
+            for day in days
+        ], batch_size=1000, ignore_conflicts=True)
+        DailyProductSales.objects.bulk_create([
+            DailyProductSales(day=day, product_id=product.id, units=rng.randint(1, 5),
+                              revenue=Decimal(rng.randint(100, 20000)))
+            for product in products for day in days
+        ], batch_size=1000, ignore_conflicts=True)
+        return admin, users[0], products[0]
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError
+
+from orders.queue import process_batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Drain queued checkouts (POST /api/orders/checkout/queue/) in batches, allocating '
+        'stock in arrival order. Runs until stopped, or until the queue is empty with --once.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--sleep', type=float, default=0.5, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty')
+
+    def handle(self, *args, **opts):
+        totals = {'completed': 0, 'failed': 0}
+        try:
+            while True:
+                try:
+                    completed, failed = process_batch(opts['batch_size'])
+                except OperationalError as exc:
+                    # SQLite refuses a writer while another holds the lock; the batch was
+                    # rolled back, so just try again
+                    if 'locked' not in str(exc):
+                        raise
+                    time.sleep(opts['sleep'])
+                    continue
+
+                if completed or failed:
+                    totals['completed'] += completed
+                    totals['failed']    += failed
+                    self.stdout.write(f'  batch: {completed} completed, {failed} failed')
+                elif opts['once']:
+                    break
+                else:
+                    time.sleep(opts['sleep'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✓ {totals["completed"]} checkout(s) completed, {totals["failed"]} failed'
+        ))
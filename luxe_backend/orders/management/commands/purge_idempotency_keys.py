@@ -0,0 +1,32 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from orders.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete Idempotency-Key records older than IDEMPOTENCY_KEY_TTL in small batches, '
+        'so the sweep never holds long locks. Safe to run from cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between batches')
+
+    def handle(self, *args, **opts):
+        cutoff  = timezone.now() - settings.IDEMPOTENCY_KEY_TTL
+        expired = IdempotencyKey.objects.filter(created_at__lt=cutoff).order_by('created_at')
+        deleted = 0
+        while True:
+            ids = list(expired.values_list('id', flat=True)[:opts['batch_size']])
+            if not ids:
+                break
+            deleted += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
+            if opts['pause']:
+                time.sleep(opts['pause'])
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Purged {deleted} expired idempotency key(s)'))
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:03
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('orders', '0003_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CheckoutTicket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('completed', 'Completed'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('lines', models.JSONField()),
+                ('detail', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('order', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ticket', to='orders.order')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkout_tickets', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'id'], name='checkout_ticket_status_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='checkoutticket',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'queued')), fields=('user',), name='checkout_ticket_one_queued_per_user'),
+        ),
+    ]
@@ -0,0 +1,108 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:21
+
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    """Seed the rollups from the orders placed so far, as `rebuild_sales_rollups` would."""
+    Order, OrderItem = apps.get_model('orders', 'Order'), apps.get_model('orders', 'OrderItem')
+    DailySales       = apps.get_model('orders', 'DailySales')
+    DailyProduct     = apps.get_model('orders', 'DailyProductSales')
+    DailyCategory    = apps.get_model('orders', 'DailyCategorySales')
+
+    revenue = Sum(ExpressionWrapper(F('price') * F('quantity'), output_field=DecimalField(max_digits=14, decimal_places=2)))
+    orders  = Order.objects.filter(status__in=('confirmed', 'shipped', 'delivered'))   # REVENUE_STATUSES
+    items   = OrderItem.objects.filter(order__in=orders).annotate(day=TruncDate('order__created_at')).order_by()
+    units   = dict(items.values('day').annotate(units=Sum('quantity')).values_list('day', 'units'))
+
+    daily = DailySales.objects.bulk_create([
+        DailySales(day=row['day'], units=units.get(row['day'], 0), revenue=row['revenue'], orders=row['orders'])
+        for row in orders.annotate(day=TruncDate('created_at')).order_by()
+                         .values('day').annotate(orders=Count('id'), revenue=Sum('total'))
+    ], batch_size=1000)
+    DailyProduct.objects.bulk_create([
+        DailyProduct(day=row['day'], product_id=row['product_id'] or 0, units=row['units'], revenue=row['revenue'])
+        for row in items.values('day', 'product_id').annotate(units=Sum('quantity'), revenue=revenue)
+    ], batch_size=1000)
+    DailyCategory.objects.bulk_create([
+        DailyCategory(day=row['day'], category_id=row['category'] or 0, units=row['units'], revenue=row['revenue'])
+        for row in items.values('day', category=F('product__category_id')).annotate(units=Sum('quantity'), revenue=revenue)
+    ], batch_size=1000)
+    apps.get_model('orders', 'SalesTotal').objects.create(
+        id=1,
+        orders=sum(row.orders for row in daily),
+        units=sum(row.units for row in daily),
+        revenue=sum((row.revenue for row in daily), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_checkout_ticket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyCategorySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('units', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('category_id', models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyProductSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('units', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('product_id', models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('units', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('orders', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SalesTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('orders', models.IntegerField(default=0)),
+                ('units', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='dailysales',
+            constraint=models.UniqueConstraint(fields=('day',), name='daily_sales_day_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='dailyproductsales',
+            index=models.Index(fields=['product_id', 'day'], name='daily_product_sales_prod_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyproductsales',
+            constraint=models.UniqueConstraint(fields=('day', 'product_id'), name='daily_product_sales_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='dailycategorysales',
+            index=models.Index(fields=['category_id', 'day'], name='daily_category_sales_cat_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailycategorysales',
+            constraint=models.UniqueConstraint(fields=('day', 'category_id'), name='daily_category_sales_uniq'),
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,13 @@
-from django.db import models
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
 from products.models import Product
 
 
+# Orders that count towards revenue
+REVENUE_STATUSES = ('confirmed', 'shipped', 'delivered')
+
+
 class Order(models.Model):
     STATUS_CHOICES = [
         ('pending',    'Pending'),
@@ -20,6 +25,12 @@ class Order(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes  = [
+            models.Index(fields=['created_at'], name='order_created_idx'),          # admin list
+            models.Index(fields=['user', 'created_at'], name='order_user_created_idx'),  # order history
+            models.Index(fields=['status', 'created_at'], name='order_status_created_idx'),  # admin status filter
+            models.Index(fields=['status', 'total'], name='order_status_total_idx'),     # covers the revenue sum
+        ]
 
     def __str__(self):
         return f"Order #{self.id} — {self.user.username} ({self.status})"
@@ -42,3 +53,167 @@ class OrderItem(models.Model):
     @property
     def subtotal(self):
         return self.price * self.quantity
+
+
+class CheckoutTicket(models.Model):
+    """
+    A queued checkout (orders.queue): the cart lines a user asked to buy,
+    waiting for process_checkout_queue to allocate stock in arrival order.
+    """
+    STATUS_CHOICES = [
+        ('queued',    'Queued'),
+        ('completed', 'Completed'),
+        ('failed',    'Failed'),
+    ]
+
+    user         = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='checkout_tickets')
+    status       = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    lines        = models.JSONField()   # [{item_id, product_id, quantity}] as seen at enqueue time
+    order        = models.OneToOneField(Order, on_delete=models.SET_NULL, null=True, blank=True, related_name='ticket')
+    detail       = models.TextField(blank=True)   # why a failed ticket failed
+    created_at   = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            # One queued ticket per user, so a double submit cannot buy the cart twice
+            models.UniqueConstraint(
+                fields=['user'], condition=models.Q(status='queued'), name='checkout_ticket_one_queued_per_user',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'id'], name='checkout_ticket_status_idx'),   # queue scans
+        ]
+
+    def __str__(self):
+        return f"Checkout ticket #{self.id} — {self.user.username} ({self.status})"
+
+
+class IdempotencyKey(models.Model):
+    """
+    A client-supplied Idempotency-Key and the response it produced; see
+    orders.idempotency. `scope` is the user the key belongs to, or
+    'anonymous' for endpoints such as signup.
+    """
+    STATUS_CHOICES = [
+        ('in_progress', 'In progress'),
+        ('completed',   'Completed'),
+    ]
+
+    scope         = models.CharField(max_length=64)
+    key           = models.CharField(max_length=255)
+    request_hash  = models.CharField(max_length=64)
+    status        = models.CharField(max_length=20, choices=STATUS_CHOICES, default='in_progress')
+    response_code = models.PositiveSmallIntegerField(null=True)
+    response_body = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    created_at    = models.DateTimeField(auto_now_add=True)
+    updated_at    = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='idempotency_scope_key_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['created_at'], name='idempotency_created_idx'),   # expiry sweeps
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.key} ({self.status})"
+
+
+# ── Sales rollups (see orders.rollups) ───────────────────────────────────────
+# Revenue-status orders only, bucketed by the local (TIME_ZONE) date they were
+# placed. Product and category ids are plain integers so history outlives
+# deleted rows; 0 means "no category" / "product since deleted".
+
+class SalesRollup(models.Model):
+    day     = models.DateField()
+    units   = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        abstract = True
+
+
+class DailySales(SalesRollup):
+    orders = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['day'], name='daily_sales_day_uniq')]
+
+    def __str__(self):
+        return f"{self.day}: {self.orders} orders, {self.revenue}"
+
+
+class DailyProductSales(SalesRollup):
+    product_id = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['day', 'product_id'], name='daily_product_sales_uniq')]
+        indexes     = [models.Index(fields=['product_id', 'day'], name='daily_product_sales_prod_idx')]
+
+    def __str__(self):
+        return f"{self.day} product {self.product_id}: {self.units} units"
+
+
+class DailyCategorySales(SalesRollup):
+    category_id = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['day', 'category_id'], name='daily_category_sales_uniq')]
+        indexes     = [models.Index(fields=['category_id', 'day'], name='daily_category_sales_cat_idx')]
+
+    def __str__(self):
+        return f"{self.day} category {self.category_id}: {self.units} units"
+
+
+class SalesTotal(models.Model):
+    """All-time running totals, a single row (id=1), so the dashboard reads revenue in O(1)."""
+    orders  = models.IntegerField(default=0)
+    units   = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.orders} orders, {self.revenue}"
+
+
+# ── Order archive (see orders.archive) ───────────────────────────────────────
+# Delivered and cancelled orders past ORDER_ARCHIVE_AFTER are moved here, ids
+# and all, so the hot tables only index recent and in-flight orders. Same
+# column names as Order / OrderItem; rows are written by INSERT ... SELECT.
+
+class ArchivedOrder(models.Model):
+    id          = models.BigIntegerField(primary_key=True)   # the original Order id
+    user        = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='archived_orders')
+    status      = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    total       = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    created_at  = models.DateTimeField()
+    updated_at  = models.DateTimeField()
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes  = [
+            models.Index(fields=['created_at'], name='archived_order_created_idx'),
+            models.Index(fields=['user', 'created_at'], name='archived_order_user_idx'),
+            models.Index(fields=['status', 'created_at'], name='archived_order_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"Archived order #{self.id} — {self.user.username} ({self.status})"
+
+
+class ArchivedOrderItem(models.Model):
+    id       = models.BigIntegerField(primary_key=True)   # the original OrderItem id
+    order    = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE, related_name='items')
+    product  = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, related_name='+')
+    name     = models.CharField(max_length=200)
+    price    = models.DecimalField(max_digits=10, decimal_places=2)
+    quantity = models.PositiveIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.quantity}x {self.name}"
+
+    @property
+    def subtotal(self):
+        return self.price * self.quantity
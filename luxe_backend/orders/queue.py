@@ -0,0 +1,159 @@
+"""
+Queued checkout for flash sales.
+
+Instead of every request thread locking the same Product rows,
+enqueue_checkout() does a cheap unlocked validation and stores a
+CheckoutTicket. process_checkout_queue then drains tickets in batches: one
+transaction per batch locks the products involved once, allocates stock to
+the tickets in arrival order in memory, and writes the orders, order items,
+stock and ticket outcomes back with a handful of bulk statements. Sharded
+products have their shard rows locked instead and are decremented once per
+batch through products.inventory.
+
+A ticket only buys the cart lines it saw: the batch locks those CartItem
+rows and fails a ticket whose lines were removed, re-quantified or already
+bought by a direct checkout since it was queued.
+"""
+from collections import Counter
+
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from accounts.counters import increment
+from cart.models import CartItem
+from products.cache import bump_catalog_version
+from products.facets import invalidate_unfiltered_facets
+from products.inventory import take_stock
+from products.models import Product, StockShard
+from .models import CheckoutTicket, Order, OrderItem
+from .rollups import record_orders
+from .stock import CheckoutError, stock_errors
+
+
+class TicketAlreadyQueued(CheckoutError):
+    def __init__(self, ticket):
+        super().__init__('You already have a checkout in the queue.')
+        self.ticket = ticket
+
+
+def enqueue_checkout(user, item_ids=None):
+    """Validate the cart without locks and queue it. Raises CheckoutError."""
+    lines = CartItem.objects.filter(cart__user=user).select_related('product')
+    if item_ids:
+        lines = lines.filter(id__in=item_ids)
+    lines = list(lines)
+    if not lines:
+        raise CheckoutError('No items to checkout.')
+
+    # Advisory only: stock is allocated for real by the worker
+    errors = stock_errors([(line.product, line.quantity) for line in lines])
+    if errors:
+        raise CheckoutError(' '.join(errors))
+
+    try:
+        with transaction.atomic():
+            return CheckoutTicket.objects.create(user=user, lines=[
+                {'item_id': line.id, 'product_id': line.product_id, 'quantity': line.quantity}
+                for line in lines
+            ])
+    except IntegrityError:
+        raise TicketAlreadyQueued(CheckoutTicket.objects.get(user=user, status='queued'))
+
+
+def queue_position(ticket):
+    """Tickets queued ahead of this one (0 = next), or None once it has been processed."""
+    if ticket.status != 'queued':
+        return None
+    return CheckoutTicket.objects.filter(status='queued', id__lt=ticket.id).count()
+
+
+def process_batch(batch_size=100):
+    """Allocate stock for up to `batch_size` queued tickets, oldest first. Returns (completed, failed)."""
+    with transaction.atomic():
+        queued = CheckoutTicket.objects.filter(status='queued').select_related('user').order_by('id')
+        if connection.features.has_select_for_update_skip_locked:
+            # Several workers can drain the queue side by side
+            queued = queued.select_for_update(skip_locked=True, of=('self',))
+        tickets = list(queued[:batch_size])
+        if not tickets:
+            return 0, 0
+
+        product_ids = {line['product_id'] for ticket in tickets for line in ticket.lines}
+        products    = {p.id: p for p in Product.objects.select_for_update().filter(id__in=product_ids).order_by('id')}
+        sharded     = {pid: p.stock_shards for pid, p in products.items() if p.stock_shards}
+        stock       = {pid: 0 if pid in sharded else p.stock for pid, p in products.items()}
+        for pid, units in StockShard.objects.select_for_update().filter(product_id__in=sharded) \
+                                            .order_by('product_id', 'shard').values_list('product_id', 'stock'):
+            stock[pid] += units
+        # Locked after the products, the same order as a direct checkout's UPDATE then DELETE
+        cart_lines  = {
+            (item_id, product_id, quantity)
+            for item_id, product_id, quantity in CartItem.objects.select_for_update().order_by('id').filter(
+                id__in=[line['item_id'] for ticket in tickets for line in ticket.lines]
+            ).values_list('id', 'product_id', 'quantity')
+        }
+        now         = timezone.now()
+
+        orders, order_items, sold = [], [], Counter()
+        for ticket in tickets:
+            ticket.processed_at = now
+            if any((line['item_id'], line['product_id'], line['quantity']) not in cart_lines for line in ticket.lines):
+                ticket.status = 'failed'
+                ticket.detail = 'Your cart changed after this checkout was queued. Please check out again.'
+                continue
+            missing = [line for line in ticket.lines if line['product_id'] not in products]
+            errors  = ['A product in your order no longer exists.'] if missing else stock_errors(
+                [(products[line['product_id']], line['quantity']) for line in ticket.lines], stock,
+            )
+            if errors:
+                ticket.status, ticket.detail = 'failed', ' '.join(errors)
+                continue
+
+            items = []
+            for line in ticket.lines:
+                product = products[line['product_id']]
+                stock[product.id] -= line['quantity']
+                if product.id not in sharded:
+                    product.stock = stock[product.id]
+                    if product.stock == 0:
+                        product.is_available = False
+                sold[product.id] += line['quantity']
+                items.append(OrderItem(product=product, name=product.name, price=product.price,
+                                       quantity=line['quantity']))
+            order = Order(user=ticket.user, status='confirmed', total=sum(i.price * i.quantity for i in items))
+            ticket.status, ticket.order = 'completed', order
+            orders.append(order)
+            order_items.append(items)
+
+        if orders:
+            if connection.features.can_return_rows_from_bulk_insert:
+                Order.objects.bulk_create(orders)
+            else:
+                for order in orders:
+                    order.save()
+            for order, items in zip(orders, order_items):
+                for item in items:
+                    item.order = order
+            OrderItem.objects.bulk_create([item for items in order_items for item in items])
+            record_orders(orders)
+            increment('orders', len(orders))   # bulk_create sends no signals
+            Product.objects.bulk_update([products[pid] for pid in sold if pid not in sharded],
+                                        ['stock', 'is_available'])
+            for pid in sold.keys() & sharded.keys():
+                take_stock(pid, sharded[pid], sold[pid])   # shards are locked, so this cannot fall short
+            CartItem.objects.filter(
+                id__in=[line['item_id'] for ticket in tickets if ticket.status == 'completed' for line in ticket.lines]
+            ).delete()
+
+            # bulk_update sends no signals
+            bump_catalog_version()
+            if any(not products[pid].is_available for pid in sold if pid not in sharded):
+                invalidate_unfiltered_facets()
+
+        for ticket in tickets:
+            if ticket.order is not None:
+                ticket.order = ticket.order   # pick up the primary key bulk_create assigned
+        CheckoutTicket.objects.bulk_update(tickets, ['status', 'order', 'detail', 'processed_at'])
+
+    completed = sum(1 for ticket in tickets if ticket.status == 'completed')
+    return completed, len(tickets) - completed
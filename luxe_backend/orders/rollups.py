@@ -0,0 +1,189 @@
+"""
+Incremental sales rollups.
+
+DailySales, DailyProductSales and DailyCategorySales hold units and revenue
+per local day (and product / category) for orders in REVENUE_STATUSES, and
+SalesTotal the all-time figures. They are kept in step as orders are
+placed (record_orders, called by both checkout paths once the items exist),
+move in or out of a revenue status (the Order post_save receiver, or
+statuses_changed for bulk transitions) or are deleted (pre_delete). Each
+change is one INSERT ... ON CONFLICT DO UPDATE per table that adds a delta,
+so concurrent checkouts cannot lose a sale. The deltas are worked out inside
+the order's transaction but written once it commits, in a short transaction
+of their own: checkouts never wait on each other for the totals row or
+today's row, and a rolled-back checkout records nothing.
+
+Archiving an order (orders.archive) leaves the rollups alone: archived
+orders still count. Edits that bypass those paths (order items changed in
+the Django admin, raw SQL) are repaired by `manage.py rebuild_sales_rollups`,
+which reads the hot and archive tables alike.
+"""
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import (
+    REVENUE_STATUSES, ArchivedOrder, DailyCategorySales, DailyProductSales, DailySales, Order, SalesTotal,
+)
+
+NONE = 0   # product/category key for "no category" / "product since deleted"
+
+
+def _upsert(model, keys, rows):
+    """Add {key tuple: (deltas...)} to `model`'s rows, creating missing ones, in one statement."""
+    if not rows:
+        return
+    table   = model._meta.db_table
+    sums    = ['units', 'revenue'] + (['orders'] if model in (DailySales, SalesTotal) else [])
+    columns = list(keys) + sums
+    values  = ', '.join(['(' + ', '.join(['%s'] * len(columns)) + ')'] * len(rows))
+    updates = ', '.join(f'{col} = {table}.{col} + excluded.{col}' for col in sums)
+    params  = [value for key, deltas in rows.items() for value in (*key, *deltas)]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} ({", ".join(columns)}) VALUES {values} '
+            f'ON CONFLICT ({", ".join(keys)}) DO UPDATE SET {updates}',
+            params,
+        )
+
+
+def _record(orders, sign):
+    days     = {order.id: timezone.localdate(order.created_at) for order in orders}
+    daily    = defaultdict(lambda: [0, Decimal(0), 0])
+    products = defaultdict(lambda: [0, Decimal(0)])
+    cats     = defaultdict(lambda: [0, Decimal(0)])
+
+    for order in orders:
+        daily[(days[order.id],)][1] += sign * order.total
+        daily[(days[order.id],)][2] += sign
+    items = orders[0].items.model.objects.filter(order_id__in=days.keys()) \
+                                        .values_list('order_id', 'product_id', 'product__category_id', 'quantity', 'price')
+    for order_id, product_id, category_id, quantity, price in items:
+        day = days[order_id]
+        daily[(day,)][0] += sign * quantity
+        for bucket in (products[(day, product_id or NONE)], cats[(day, category_id or NONE)]):
+            bucket[0] += sign * quantity
+            bucket[1] += sign * price * quantity
+
+    transaction.on_commit(lambda: _write(daily, products, cats))
+
+
+def _write(daily, products, cats):
+    with transaction.atomic():
+        # The totals row goes first: it serializes rollup writers (no deadlocks on
+        # the daily rows) and waits out a concurrent rebuild(), which locks it
+        _upsert(SalesTotal, ['id'], {(1,): [sum(column) for column in zip(*daily.values())]})
+        _upsert(DailySales, ['day'], daily)
+        _upsert(DailyProductSales, ['day', 'product_id'], products)
+        _upsert(DailyCategorySales, ['day', 'category_id'], cats)
+
+
+def record_orders(orders):
+    """Add newly placed orders (saved, with their items) to the rollups. Non-revenue orders are skipped."""
+    orders = [order for order in orders if order.status in REVENUE_STATUSES]
+    if orders:
+        _record(orders, 1)
+
+
+def status_changed(order, old_status):
+    """Apply an order's move into or out of the revenue statuses."""
+    statuses_changed([order], old_status)
+
+
+def statuses_changed(orders, old_status):
+    """The same for orders that all left `old_status` for one new status (bulk transitions)."""
+    if not orders:
+        return
+    was, now = old_status in REVENUE_STATUSES, orders[0].status in REVENUE_STATUSES
+    if was != now:
+        _record(orders, 1 if now else -1)
+
+
+def order_deleted(order):
+    """Take a revenue order (hot or archived) out of the rollups; call before its items are deleted."""
+    if order.status in REVENUE_STATUSES:
+        _record([order], -1)
+
+
+# ── Rebuild ─────────────────────────────────────────────────────────────────
+
+def _midnight(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def _sources(start, end):
+    """(orders, items) querysets over revenue orders in start..end, hot table then archive."""
+    for order_model in (Order, ArchivedOrder):
+        orders = order_model.objects.filter(status__in=REVENUE_STATUSES)
+        if start:
+            orders = orders.filter(created_at__gte=_midnight(start))
+        if end:
+            orders = orders.filter(created_at__lt=_midnight(end + datetime.timedelta(days=1)))
+        items = order_model.items.rel.related_model.objects.filter(order__in=orders) \
+                                                 .annotate(day=TruncDate('order__created_at')).order_by()
+        yield orders, items
+
+
+def rebuild(start=None, end=None):
+    """
+    Recompute the daily rollups from the order tables (hot and archived), for
+    every day or for the local days start..end (inclusive), then the all-time
+    totals. Returns the number of DailySales rows written. An order committed
+    just as it starts can be counted twice (its delta is written after the
+    rebuild commits), so run it while checkout is quiet.
+    """
+    days = {}
+    if start:
+        days['day__gte'] = start
+    if end:
+        days['day__lte'] = end
+    revenue = Sum(ExpressionWrapper(F('price') * F('quantity'), output_field=DecimalField(max_digits=14, decimal_places=2)))
+
+    with transaction.atomic():
+        SalesTotal.objects.get_or_create(id=1)
+        SalesTotal.objects.select_for_update().get(id=1)   # hold off the deferred writes until this commits
+        daily    = defaultdict(lambda: [0, Decimal(0), 0])   # day -> units, revenue, orders
+        products = defaultdict(lambda: [0, Decimal(0)])
+        cats     = defaultdict(lambda: [0, Decimal(0)])
+        for orders, items in _sources(start, end):
+            for row in orders.annotate(day=TruncDate('created_at')).order_by() \
+                             .values('day').annotate(orders=Count('id'), revenue=Sum('total')):
+                daily[row['day']][1] += row['revenue']
+                daily[row['day']][2] += row['orders']
+            for day, units in items.values('day').annotate(units=Sum('quantity')).values_list('day', 'units'):
+                daily[day][0] += units
+            for row in items.values('day', 'product_id').annotate(units=Sum('quantity'), revenue=revenue):
+                bucket = products[row['day'], row['product_id'] or NONE]
+                bucket[0] += row['units']
+                bucket[1] += row['revenue']
+            for row in items.values('day', category=F('product__category_id')) \
+                            .annotate(units=Sum('quantity'), revenue=revenue):
+                bucket = cats[row['day'], row['category'] or NONE]
+                bucket[0] += row['units']
+                bucket[1] += row['revenue']
+
+        for model in (DailySales, DailyProductSales, DailyCategorySales):
+            model.objects.filter(**days).delete()
+        DailySales.objects.bulk_create([
+            DailySales(day=day, units=units, revenue=amount, orders=count)
+            for day, (units, amount, count) in daily.items()
+        ], batch_size=1000)
+        DailyProductSales.objects.bulk_create([
+            DailyProductSales(day=day, product_id=product_id, units=units, revenue=amount)
+            for (day, product_id), (units, amount) in products.items()
+        ], batch_size=1000)
+        DailyCategorySales.objects.bulk_create([
+            DailyCategorySales(day=day, category_id=category_id, units=units, revenue=amount)
+            for (day, category_id), (units, amount) in cats.items()
+        ], batch_size=1000)
+
+        totals = DailySales.objects.aggregate(
+            orders=Sum('orders', default=0), units=Sum('units', default=0), revenue=Sum('revenue', default=0),
+        )
+        SalesTotal.objects.update_or_create(id=1, defaults=totals)
+        return DailySales.objects.filter(**days).count()
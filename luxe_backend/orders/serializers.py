@@ -1,5 +1,8 @@
 from rest_framework import serializers
-from .models import Order, OrderItem
+from luxe_backend.projection import Projection
+from .fulfilment import TRANSITIONS
+from .models import ArchivedOrderItem, CheckoutTicket, Order, OrderItem
+from .queue import queue_position
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -18,3 +21,77 @@ class OrderSerializer(serializers.ModelSerializer):
     class Meta:
         model  = Order
         fields = ('id', 'username', 'email', 'status', 'total', 'items', 'created_at', 'updated_at')
+
+
+class CheckoutTicketSerializer(serializers.ModelSerializer):
+    order    = OrderSerializer(read_only=True)
+    position = serializers.SerializerMethodField()
+
+    class Meta:
+        model  = CheckoutTicket
+        fields = ('id', 'status', 'position', 'order', 'detail', 'created_at', 'processed_at')
+
+    def get_position(self, obj):
+        return queue_position(obj)
+
+
+class OrderTransitionSerializer(serializers.Serializer):
+    """Body of POST /api/admin/orders/transition/ — `ids` or `filter`, not both."""
+    MAX_IDS     = 5000
+    FILTER_KEYS = ('user', 'search', 'from', 'to')
+
+    from_status = serializers.ChoiceField(choices=Order.STATUS_CHOICES)
+    to_status   = serializers.ChoiceField(choices=Order.STATUS_CHOICES)
+    ids         = serializers.ListField(child=serializers.IntegerField(), min_length=1, max_length=MAX_IDS,
+                                        required=False)
+    filter      = serializers.DictField(child=serializers.CharField(), required=False)
+
+    def validate_filter(self, value):
+        unknown = set(value) - set(self.FILTER_KEYS)
+        if unknown:
+            raise serializers.ValidationError(
+                f'Unknown filter(s): {", ".join(sorted(unknown))}. Use {", ".join(self.FILTER_KEYS)}.'
+            )
+        return value
+
+    def validate(self, data):
+        if ('ids' in data) == ('filter' in data):
+            raise serializers.ValidationError('Send either ids or filter.')
+        if data['to_status'] not in TRANSITIONS.get(data['from_status'], ()):
+            raise serializers.ValidationError(
+                {'to_status': f'Orders cannot go from {data["from_status"]} to {data["to_status"]}.'}
+            )
+        return data
+
+
+class OrderProjection(Projection):
+    """Lean ?fields= / ?expand= representation of the order list views."""
+    fields = {
+        'id':         'id',
+        'username':   'user__username',
+        'email':      'user__email',
+        'status':     'status',
+        'total':      'total',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }
+    collections = ('items',)
+
+    def fetch_items(self, ids):
+        items = {}
+        rows = list(OrderItem.objects.filter(order_id__in=ids).order_by('id')
+                                     .values('order_id', 'id', 'name', 'price', 'quantity'))
+        # Orders without hot items are archived ones (or empty): look there too
+        missing = set(ids) - {row['order_id'] for row in rows}
+        if missing:
+            rows += ArchivedOrderItem.objects.filter(order_id__in=missing).order_by('id') \
+                                             .values('order_id', 'id', 'name', 'price', 'quantity')
+        for row in rows:
+            items.setdefault(row['order_id'], []).append({
+                'id':       row['id'],
+                'name':     row['name'],
+                'price':    str(row['price']),
+                'quantity': row['quantity'],
+                'subtotal': str(row['price'] * row['quantity']),
+            })
+        return items
@@ -0,0 +1,48 @@
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+from accounts.counters import decrement, increment
+from .models import ArchivedOrder, Order
+from .rollups import order_deleted, status_changed
+
+
+@receiver(post_init, sender=Order)
+def remember_status(sender, instance, **kwargs):
+    instance._rollup_status = instance.status
+
+
+@receiver(post_save, sender=Order)
+def update_rollups_on_save(sender, instance, created, **kwargs):
+    # New orders are recorded by the checkout paths once their items exist
+    if not created:
+        status_changed(instance, instance._rollup_status)
+    instance._rollup_status = instance.status
+
+
+@receiver(post_save, sender=Order)
+def count_new_order(sender, instance, created, **kwargs):
+    if created:
+        increment('orders')
+
+
+@receiver(pre_delete, sender=Order)
+def update_rollups_on_delete(sender, instance, **kwargs):
+    # pre_delete: the rollups need the order's items, which a cascade removes first
+    order_deleted(instance)
+
+
+@receiver(post_delete, sender=Order)
+def count_deleted_order(sender, instance, **kwargs):
+    decrement('orders')
+
+
+# Archived orders still count (orders.archive); deleting one, e.g. with its
+# user, takes it out of the rollups and the order count like a hot order
+
+@receiver(pre_delete, sender=ArchivedOrder)
+def update_rollups_on_archived_delete(sender, instance, **kwargs):
+    order_deleted(instance)
+
+
+@receiver(post_delete, sender=ArchivedOrder)
+def count_deleted_archived_order(sender, instance, **kwargs):
+    decrement('orders')
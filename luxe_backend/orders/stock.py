@@ -0,0 +1,64 @@
+"""
+Set-based stock allocation shared by the checkout paths.
+"""
+from django.db.models import Case, F, IntegerField, Value, When
+
+from products.inventory import current_stock, take_stock
+from products.models import Product
+
+
+class CheckoutError(Exception):
+    def __init__(self, detail):
+        super().__init__(detail)
+        self.detail = detail
+
+
+def stock_errors(lines, stock=None):
+    """
+    Human-readable problems for (product, quantity) pairs, checked against the
+    given rows, or against `stock` ({product_id: units}) where it has an entry.
+    """
+    stock  = stock or {}
+    errors = []
+    for product, quantity in lines:
+        units = stock[product.id] if product.id in stock else current_stock(product)
+        if not product.is_available:
+            errors.append(f'"{product.name}" is no longer available.')
+        elif quantity > units:
+            errors.append(
+                f'"{product.name}" only has {units} unit(s) in stock, '
+                f'but you requested {quantity}.'
+            )
+    return errors
+
+
+def decrement_stock(quantities, sharded=None):
+    """
+    Take {product_id: quantity} out of stock in one UPDATE:
+
+        SET stock = stock - q, is_available = (stock - q > 0 AND is_available)
+        WHERE id IN (...) AND is_available AND stock >= q
+
+    and return the number of products updated. Products in `sharded`
+    ({product_id: shard count}) are taken from their stock shards instead.
+    Anything short of len(quantities) means some product lacked the stock;
+    the caller must roll back. Sends no signals.
+    """
+    sharded = sharded or {}
+    updated = sum(1 for pid, shards in sharded.items() if take_stock(pid, shards, quantities[pid]))
+
+    plain = {pid: qty for pid, qty in quantities.items() if pid not in sharded}
+    if not plain:
+        return updated
+    wanted = Case(
+        *[When(id=pid, then=Value(qty)) for pid, qty in plain.items()],
+        output_field=IntegerField(),
+    )
+    return updated + (
+        Product.objects
+        .filter(id__in=plain.keys(), is_available=True, stock__gte=wanted)
+        .update(
+            stock=F('stock') - wanted,
+            is_available=Case(When(stock__lte=wanted, then=Value(False)), default=F('is_available')),
+        )
+    )
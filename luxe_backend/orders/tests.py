@@ -0,0 +1,160 @@
+import threading
+from collections import Counter
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+
+from cart.models import Cart, CartItem
+from products.inventory import effective_stock_expression, enable_sharding
+from products.models import Product
+from .models import CheckoutTicket, DailySales, Order, OrderItem, SalesTotal
+from .queue import process_batch
+from .views import CheckoutView
+
+User = get_user_model()
+
+
+class QueuedCheckoutTests(APITestCase):
+    def setUp(self):
+        self.user    = User.objects.create_user(username='buyer', password='pw')
+        self.product = Product.objects.create(name='Limited Watch', description='d', price=Decimal('100.00'), stock=10)
+        self.item    = CartItem.objects.create(cart=Cart.objects.create(user=self.user), product=self.product, quantity=2)
+        self.client.force_authenticate(self.user)
+
+    def queue(self):
+        response = self.client.post('/api/orders/checkout/queue/', {}, format='json')
+        self.assertEqual(response.status_code, 202)
+        return CheckoutTicket.objects.get(id=response.data['id'])
+
+    def test_direct_checkout_is_refused_while_a_ticket_is_queued(self):
+        ticket   = self.queue()
+        response = self.client.post('/api/orders/checkout/', {}, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['ticket']['id'], ticket.id)
+
+        self.assertEqual(process_batch(), (1, 0))
+        self.assertEqual(Order.objects.filter(user=self.user).count(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 8)
+
+    def test_ticket_fails_when_its_cart_lines_are_gone(self):
+        ticket = self.queue()
+        self.item.delete()
+
+        self.assertEqual(process_batch(), (0, 1))
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.status, 'failed')
+        self.assertFalse(Order.objects.exists())
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 10)
+
+    def test_ticket_fails_when_a_quantity_changed(self):
+        ticket = self.queue()
+        CartItem.objects.filter(id=self.item.id).update(quantity=5)
+        other  = CartItem.objects.create(cart=self.item.cart, product=Product.objects.create(
+            name='Strap', description='d', price=Decimal('10.00'), stock=3), quantity=1)
+
+        self.assertEqual(process_batch(), (0, 1))
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.status, 'failed')
+        self.assertEqual(set(CartItem.objects.values_list('id', flat=True)), {self.item.id, other.id})
+
+
+class SalesRollupTests(APITestCase):
+    def test_checkout_writes_the_rollups_after_it_commits(self):
+        user    = User.objects.create_user(username='buyer', password='pw')
+        product = Product.objects.create(name='Ring', description='d', price=Decimal('25.00'), stock=5)
+        CartItem.objects.create(cart=Cart.objects.create(user=user), product=product, quantity=2)
+        self.client.force_authenticate(user)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertEqual(self.client.post('/api/orders/checkout/', {}, format='json').status_code, 201)
+            # Nothing locked or written inside the checkout's transaction
+            self.assertEqual(SalesTotal.objects.values_list('orders', flat=True).get(), 0)
+            self.assertFalse(DailySales.objects.exists())
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual(SalesTotal.objects.values_list('orders', 'units', 'revenue').get(), (1, 2, Decimal('50.00')))
+        self.assertEqual(DailySales.objects.values_list('orders', 'units', 'revenue').get(), (1, 2, Decimal('50.00')))
+
+
+class QueryPlanTests(TestCase):
+    def test_hot_querysets_use_indexes(self):
+        try:
+            call_command('check_query_plans', rows=500, stdout=StringIO())
+        except CommandError as exc:
+            self.fail(exc)   # names the querysets that fell back to a full table scan
+
+
+class ConcurrentCheckoutTests(TransactionTestCase):
+    """Many customers check out carts that together want more than the stock, from real threads."""
+    STOCK, CUSTOMERS, THREADS, LINES = 20, 16, 8, 3
+
+    def setUp(self):
+        self.products = [
+            Product.objects.create(name=f'Flash {i}', description='d', price=Decimal('10.00'), stock=self.STOCK)
+            for i in range(self.LINES)
+        ]
+        User.objects.bulk_create([User(username=f'rush-{i}') for i in range(self.CUSTOMERS)])
+        self.users = list(User.objects.filter(username__startswith='rush-'))
+        Cart.objects.bulk_create([Cart(user=user) for user in self.users])
+        CartItem.objects.bulk_create([
+            CartItem(cart=cart, product=product, quantity=2)
+            for cart in Cart.objects.filter(user__in=self.users) for product in self.products
+        ])
+
+    def checkout_all(self):
+        results = Counter()
+        lock    = threading.Lock()
+        pending = iter(self.users)
+
+        def worker():
+            view = CheckoutView.as_view()
+            try:
+                while True:
+                    with lock:
+                        user = next(pending, None)
+                    if user is None:
+                        return
+                    request = APIRequestFactory().post('/api/orders/checkout/', {}, format='json')
+                    force_authenticate(request, user=user)
+                    code = view(request).status_code
+                    with lock:
+                        results[code] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def assert_never_oversold(self, results):
+        self.assertEqual(set(results) - {201, 400}, set(), results)
+        self.assertEqual(results[201], self.STOCK // 2)   # 2 units of every product per order
+        ids   = [product.id for product in self.products]
+        stock = dict(Product.objects.filter(id__in=ids).annotate(units=effective_stock_expression())
+                     .values_list('id', 'units'))
+        sold  = dict(OrderItem.objects.filter(product_id__in=ids).values('product_id')
+                     .annotate(units=Sum('quantity')).values_list('product_id', 'units'))
+        for pid in ids:
+            self.assertEqual(stock[pid], 0)
+            self.assertEqual(sold[pid], self.STOCK)
+        self.assertEqual(Order.objects.count(), results[201])
+
+    def test_plain_stock_is_never_oversold(self):
+        self.assert_never_oversold(self.checkout_all())
+
+    def test_sharded_stock_is_never_oversold(self):
+        for product in self.products:
+            enable_sharding(product.id, 4)
+        self.assert_never_oversold(self.checkout_all())
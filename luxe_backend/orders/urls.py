@@ -1,9 +1,19 @@
 from django.urls import path
-from .views import CheckoutView, UserOrderListView, AdminOrderListView, AdminOrderDetailView
+from .views import (
+    CheckoutView, QueuedCheckoutView, CheckoutTicketView, UserOrderListView,
+    AdminOrderListView, AdminOrderExportView, AdminOrderDetailView, AdminOrderTransitionView,
+    AdminSalesTimeseriesView,
+)
+
 
 urlpatterns = [
     path('orders/checkout/', CheckoutView.as_view(),        name='checkout'),
+    path('orders/checkout/queue/', QueuedCheckoutView.as_view(), name='checkout-queue'),
+    path('orders/checkout/tickets/<int:pk>/', CheckoutTicketView.as_view(), name='checkout-ticket'),
     path('orders/',          UserOrderListView.as_view(),   name='user-orders'),
     path('admin/orders/',    AdminOrderListView.as_view(),  name='admin-order-list'),
+    path('admin/orders/export/', AdminOrderExportView.as_view(), name='admin-order-export'),
+    path('admin/orders/transition/', AdminOrderTransitionView.as_view(), name='admin-order-transition'),
     path('admin/orders/<int:pk>/', AdminOrderDetailView.as_view(), name='admin-order-detail'),
+    path('admin/analytics/timeseries/', AdminSalesTimeseriesView.as_view(), name='admin-sales-timeseries'),
 ]
@@ -1,13 +1,36 @@
+import datetime
+import time
+from decimal import Decimal
+
 from rest_framework import generics, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.contrib.auth import get_user_model
 from django.db import transaction
-from django.db.models import Q
-from cart.models import Cart
-from products.models import Product
-from .models import Order, OrderItem
-from .serializers import OrderSerializer
+from django.db.models import Exists, F, OuterRef, Q, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from cart.models import Cart, CartItem
+from luxe_backend.projection import SparseFieldsMixin
+from products.cache import bump_catalog_version
+from products.facets import invalidate_unfiltered_facets
+from products.models import Category, Product
+from . import archive, export
+from .fulfilment import transition_orders
+from .idempotency import idempotent
+from .models import (
+    ArchivedOrder, CheckoutTicket, DailyCategorySales, DailyProductSales, DailySales, Order, OrderItem,
+)
+from .queue import TicketAlreadyQueued, enqueue_checkout
+from .rollups import record_orders
+from .stock import CheckoutError, decrement_stock, stock_errors
+from .serializers import CheckoutTicketSerializer, OrderSerializer, OrderProjection, OrderTransitionSerializer
+
+User = get_user_model()
 
 
 # ── User: place order ────────────────────────────────────────────────────────
@@ -16,101 +39,412 @@ class CheckoutView(APIView):
     """
     POST /api/orders/checkout/
     Optional body: { item_ids: [1,2,3] } — checkout only selected cart items.
-    Validates stock before placing order, then decrements stock.
+    Honours an Idempotency-Key header, so a retried checkout places one order.
+    Set-based: the cart lines are read once, every product's stock is
+    decremented by one conditional UPDATE (stock = stock - q WHERE stock >= q)
+    and the order items are bulk-inserted, so two concurrent checkouts can
+    never oversell. Answers 409 while the user has a queued checkout ticket.
     """
     permission_classes = [IsAuthenticated]
 
+    @idempotent()
     def post(self, request):
+        item_ids = request.data.get('item_ids')
         try:
-            cart = Cart.objects.get(user=request.user)
-        except Cart.DoesNotExist:
-            return Response({'detail': 'Your cart is empty.'}, status=status.HTTP_400_BAD_REQUEST)
+            with transaction.atomic():
+                order = self.place_order(request.user, item_ids)
+        except TicketAlreadyQueued as exc:
+            return Response(
+                {'detail': exc.detail, 'ticket': CheckoutTicketSerializer(exc.ticket).data},
+                status=status.HTTP_409_CONFLICT,
+            )
+        except CheckoutError as exc:
+            return Response({'detail': exc.detail}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
+
+    def place_order(self, user, item_ids=None):
+        # Open with a write to the cart row. It serializes checkouts of the same
+        # cart (a concurrent one waits, then finds the lines gone), and on SQLite
+        # it takes the write lock up front instead of failing to upgrade a read lock.
+        if not Cart.objects.filter(user=user).update(updated_at=timezone.now()):
+            raise CheckoutError('Your cart is empty.')
+        # The queue worker would buy the same lines again
+        ticket = CheckoutTicket.objects.filter(user=user, status='queued').first()
+        if ticket is not None:
+            raise TicketAlreadyQueued(ticket)
 
-        item_ids   = request.data.get('item_ids')
-        cart_items = cart.items.select_related('product').all()
+        lines = CartItem.objects.filter(cart__user=user).select_related('product')
         if item_ids:
-            cart_items = cart_items.filter(id__in=item_ids)
-
-        if not cart_items.exists():
-            return Response({'detail': 'No items to checkout.'}, status=status.HTTP_400_BAD_REQUEST)
-
-        # ── Stock validation BEFORE touching the DB ──
-        errors = []
-        for ci in cart_items:
-            product = ci.product
-            if not product.is_available:
-                errors.append(f'"{product.name}" is no longer available.')
-            elif ci.quantity > product.stock:
-                errors.append(
-                    f'"{product.name}" only has {product.stock} unit(s) in stock, '
-                    f'but you requested {ci.quantity}.'
-                )
+            lines = lines.filter(id__in=item_ids)
+        lines = list(lines)
+        if not lines:
+            raise CheckoutError('No items to checkout.')
+
+        # ── Stock validation against the rows just read, for readable errors ──
+        errors = stock_errors([(line.product, line.quantity) for line in lines])
         if errors:
-            return Response({'detail': ' '.join(errors)}, status=status.HTTP_400_BAD_REQUEST)
-
-        # ── Place order atomically ──
-        with transaction.atomic():
-            order = Order.objects.create(user=request.user, status='confirmed')
-
-            for ci in cart_items:
-                product = ci.product
-                OrderItem.objects.create(
-                    order    = order,
-                    product  = product,
-                    name     = product.name,
-                    price    = product.price,
-                    quantity = ci.quantity,
-                )
-                # Decrement stock
-                product.stock = product.stock - ci.quantity
-                if product.stock == 0:
-                    product.is_available = False
-                product.save(update_fields=['stock', 'is_available'])
-
-            order.recalculate_total()
-            cart_items.delete()   # remove from cart
+            raise CheckoutError(' '.join(errors))
 
-        return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
+        # ── Decrement every product in one conditional statement ──
+        wanted  = {line.product_id: line.quantity for line in lines}
+        sharded = {line.product_id: line.product.stock_shards for line in lines if line.product.stock_shards}
+        try:
+            with transaction.atomic():
+                if decrement_stock(wanted, sharded) != len(wanted):
+                    raise CheckoutError('Stock changed during checkout. Please try again.')
+        except CheckoutError as exc:
+            # Stock moved since the read above; once the savepoint has undone the
+            # partial decrement, report against fresh values
+            products = Product.objects.in_bulk(wanted.keys())
+            raise CheckoutError(' '.join(stock_errors([(products[pid], qty) for pid, qty in wanted.items()]))
+                                or exc.detail)
+
+        order = Order.objects.create(
+            user   = user,
+            status = 'confirmed',
+            total  = sum(line.product.price * line.quantity for line in lines),
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order    = order,
+                product  = line.product,
+                name     = line.product.name,
+                price    = line.product.price,
+                quantity = line.quantity,
+            )
+            for line in lines
+        ])
+        CartItem.objects.filter(id__in=[line.id for line in lines]).delete()   # remove from cart
+        record_orders([order])
+
+        # The UPDATE sent no signals: stock shows in the catalog, and sold-out products leave the facets
+        bump_catalog_version()
+        if Product.objects.filter(id__in=wanted.keys(), stock=0).exists():
+            invalidate_unfiltered_facets()
+        return order
+
+
+class QueuedCheckoutView(APIView):
+    """
+    POST /api/orders/checkout/queue/
+    Optional body: { item_ids: [1,2,3] }
+    Flash-sale checkout: validates the cart without taking locks, queues it and
+    answers 202 with a ticket. process_checkout_queue allocates stock in
+    arrival order; poll GET /api/orders/checkout/tickets/<id>/ for the result.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @idempotent()
+    def post(self, request):
+        try:
+            ticket = enqueue_checkout(request.user, request.data.get('item_ids'))
+        except TicketAlreadyQueued as exc:
+            return Response(
+                {'detail': exc.detail, 'ticket': CheckoutTicketSerializer(exc.ticket).data},
+                status=status.HTTP_409_CONFLICT,
+            )
+        except CheckoutError as exc:
+            return Response({'detail': exc.detail}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(CheckoutTicketSerializer(ticket).data, status=status.HTTP_202_ACCEPTED)
+
+
+class CheckoutTicketView(APIView):
+    """
+    GET /api/orders/checkout/tickets/<id>/?wait=<seconds>
+    Status of a queued checkout: queued (with its queue position), completed
+    (with the order) or failed (with the reason). `wait` holds the request open
+    up to MAX_WAIT seconds until the ticket leaves the queue (long polling).
+    """
+    permission_classes = [IsAuthenticated]
+    MAX_WAIT      = 25
+    POLL_INTERVAL = 0.25
+
+    def get(self, request, pk):
+        try:
+            wait = min(max(float(request.query_params.get('wait', 0)), 0), self.MAX_WAIT)
+        except ValueError:
+            return Response({'detail': 'wait must be a number of seconds.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        tickets  = CheckoutTicket.objects.filter(user=request.user).select_related('order')
+        deadline = time.monotonic() + wait
+        ticket   = get_object_or_404(tickets, pk=pk)
+        while ticket.status == 'queued' and time.monotonic() < deadline:
+            time.sleep(self.POLL_INTERVAL)
+            ticket = tickets.get(pk=pk)
+        return Response(CheckoutTicketSerializer(ticket).data)
 
 
-class UserOrderListView(generics.ListAPIView):
-    """GET /api/orders/  — logged-in user's own order history"""
+class UserOrderListView(SparseFieldsMixin, generics.ListAPIView):
+    """
+    GET /api/orders/  — logged-in user's own order history
+    Query params: from, to (inclusive YYYY-MM-DD), fields, expand=items
+    (lean projection, see luxe_backend.projection). Archived orders are
+    included whenever the range reaches back to them.
+    """
     serializer_class   = OrderSerializer
+    projection_class   = OrderProjection
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user).prefetch_related('items')
+        params = self.request.query_params
+        return archive.spanning(
+            lambda orders: filter_dates(
+                orders.filter(user=self.request.user).select_related('user').prefetch_related('items'), params,
+            ),
+            start=_range_start(params),
+        )
 
 
 # ── Admin: full order management ─────────────────────────────────────────────
 
-class AdminOrderListView(generics.ListAPIView):
+PREFIX_USER_LIMIT = 50   # matching users beyond which a search walks orders by date instead
+
+
+def _date_param(params, name):
+    try:
+        return datetime.date.fromisoformat(params[name])
+    except ValueError:
+        raise ValidationError({name: 'Expected a date (YYYY-MM-DD).'})
+
+
+def _day_start(params, name, days=0):
+    """Midnight (in TIME_ZONE) at the start of the YYYY-MM-DD day in params[name], plus `days`."""
+    day = _date_param(params, name)
+    return timezone.make_aware(datetime.datetime.combine(day + datetime.timedelta(days=days), datetime.time.min))
+
+
+def _placed_by(users):
+    """
+    Order filter for the users matching `users` (a Q on User), resolved against
+    the users table's prefix indexes first. A handful of users becomes a literal
+    user_id IN (...) served by the per-user index; a broad prefix matches a good
+    share of all orders, so walking created_at newest-first with a per-row
+    EXISTS finds a page sooner than collecting and sorting all their orders.
+    """
+    ids = list(User.objects.filter(users).values_list('id', flat=True)[:PREFIX_USER_LIMIT + 1])
+    if len(ids) <= PREFIX_USER_LIMIT:
+        return Q(user_id__in=ids)
+    return Exists(User.objects.filter(users, id=OuterRef('user_id')))
+
+
+def _range_start(params):
+    return _day_start(params, 'from') if params.get('from') else None
+
+
+def filter_dates(qs, params):
+    """The from/to params as a half-open created_at range, not a DATE() cast on the column."""
+    if params.get('from'):
+        qs = qs.filter(created_at__gte=_day_start(params, 'from'))
+    if params.get('to'):
+        qs = qs.filter(created_at__lt=_day_start(params, 'to', days=1))   # `to` is inclusive
+    return qs
+
+
+def filter_admin_orders(qs, params):
+    """
+    Apply the admin order list's status/user/search/from/to query params to `qs`
+    (Order or ArchivedOrder rows).
+
+    Every filter is written so an index can serve it: from/to become a
+    created_at range, and user/search are case-insensitive username/email
+    *prefix* matches.
+    """
+    if s := params.get('status'):
+        qs = qs.filter(status=s)
+    if u := params.get('user'):
+        qs = qs.filter(_placed_by(Q(username__istartswith=u)))
+    if search := params.get('search'):
+        qs = qs.filter(_placed_by(Q(username__istartswith=search) | Q(email__istartswith=search)))
+    return filter_dates(qs, params)
+
+
+def admin_orders(params, build=lambda orders: orders.all()):
+    """filter_admin_orders over the hot table, and the archive too when the params reach it."""
+    return archive.spanning(
+        lambda orders: filter_admin_orders(build(orders), params),
+        start=_range_start(params), status=params.get('status') or None,
+    )
+
+
+class AdminOrderListView(SparseFieldsMixin, generics.ListAPIView):
     """
     GET /api/admin/orders/
-    Query params: status, user, search, from, to
+    Query params: status, user, search, from, to, fields, expand=items
+    user/search match username (or email) prefixes; from/to are inclusive
+    YYYY-MM-DD dates in TIME_ZONE. Archived orders are included whenever
+    the filters can match them.
     """
     serializer_class   = OrderSerializer
+    projection_class   = OrderProjection
     permission_classes = [IsAdminUser]
 
     def get_queryset(self):
-        qs = Order.objects.select_related('user').prefetch_related('items')
+        return admin_orders(self.request.query_params,
+                            lambda orders: orders.select_related('user').prefetch_related('items'))
+
+
+class AdminOrderExportView(APIView):
+    """
+    GET /api/admin/orders/export/?format=csv|jsonl
+    Every matching order item as one flat row, streamed. Takes the same
+    status/user/search/from/to params as the admin order list.
+    """
+    permission_classes = [IsAdminUser]
 
-        if s := self.request.query_params.get('status'):
-            qs = qs.filter(status=s)
-        if u := self.request.query_params.get('user'):
-            qs = qs.filter(user__username__icontains=u)
-        if search := self.request.query_params.get('search'):
-            qs = qs.filter(Q(user__username__icontains=search) | Q(user__email__icontains=search))
-        if f := self.request.query_params.get('from'):
-            qs = qs.filter(created_at__date__gte=f)
-        if t := self.request.query_params.get('to'):
-            qs = qs.filter(created_at__date__lte=t)
+    def perform_content_negotiation(self, request, force=False):
+        # ?format= names the export, not a DRF renderer; errors still render as JSON
+        return super().perform_content_negotiation(request, force=True)
 
-        return qs
+    def get(self, request):
+        fmt = request.query_params.get('format', 'csv')
+        if fmt not in export.FORMATS:
+            return Response({'format': f'Choose one of: {", ".join(export.FORMATS)}.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        orders   = admin_orders(request.query_params)
+        response = StreamingHttpResponse(
+            export.render(export.export_rows(orders), fmt),
+            content_type='text/csv' if fmt == 'csv' else 'application/x-ndjson',
+        )
+        stamp = timezone.localtime().strftime('%Y%m%d-%H%M%S')
+        response['Content-Disposition'] = f'attachment; filename="orders-{stamp}.{fmt}"'
+        return response
 
 
 class AdminOrderDetailView(generics.RetrieveUpdateAPIView):
-    """GET / PATCH /api/admin/orders/<id>/"""
+    """
+    GET / PATCH /api/admin/orders/<id>/
+    Archived orders can be read here too, but not changed.
+    """
     queryset           = Order.objects.all()
     serializer_class   = OrderSerializer
-    permission_classes = [IsAdminUser]
\ No newline at end of file
+    permission_classes = [IsAdminUser]
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            order = get_object_or_404(ArchivedOrder.objects.select_related('user'), pk=kwargs['pk'])
+            return Response(self.get_serializer(order).data)
+
+
+class AdminOrderTransitionView(APIView):
+    """
+    POST /api/admin/orders/transition/
+    Body: { from_status, to_status, ids: [1,2,3] }
+       or { from_status, to_status, filter: { user?, search?, from?, to? } }
+    Moves every listed (or matching) order still in from_status with one
+    guarded UPDATE; orders in any other status are skipped. Cancelling puts
+    the items back in stock. Returns counts, not orders. Honours an
+    Idempotency-Key header.
+    """
+    permission_classes = [IsAdminUser]
+
+    @idempotent()
+    def post(self, request):
+        serializer = OrderTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        if 'ids' in data:
+            orders = Order.objects.filter(id__in=set(data['ids']))
+        else:
+            orders = filter_admin_orders(Order.objects.all(), data['filter'])
+        result = transition_orders(orders, data['from_status'], data['to_status'])
+
+        summary = {'from_status': data['from_status'], 'to_status': data['to_status'], **result}
+        if 'ids' in data:
+            summary['requested'] = len(set(data['ids']))
+            summary['skipped']   = summary['requested'] - result['transitioned']
+        return Response(summary)
+
+
+# ── Admin: sales analytics ───────────────────────────────────────────────────
+
+def _period_start(day, granularity):
+    if granularity == 'week':
+        return day - datetime.timedelta(days=day.weekday())   # ISO weeks start on Monday, like TruncWeek
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _next_period(day, granularity):
+    if granularity == 'week':
+        return day + datetime.timedelta(days=7)
+    if granularity == 'month':
+        return (day.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+    return day + datetime.timedelta(days=1)
+
+
+class AdminSalesTimeseriesView(APIView):
+    """
+    GET /api/admin/analytics/timeseries/
+    Query params: from, to (inclusive YYYY-MM-DD, default the last 30 days),
+                  granularity=day|week|month, group=total|product|category,
+                  id (restrict a product/category group to one id)
+    Revenue-status sales per period, read only from the daily rollups.
+    `total` is zero-filled; product/category series list the periods with sales.
+    """
+    permission_classes = [IsAdminUser]
+
+    GRANULARITIES = {'day': None, 'week': TruncWeek, 'month': TruncMonth}
+    GROUPS        = {
+        'total':    (DailySales, None, None),
+        'product':  (DailyProductSales, 'product_id', Product),
+        'category': (DailyCategorySales, 'category_id', Category),
+    }
+
+    def get(self, request):
+        params      = request.query_params
+        granularity = params.get('granularity', 'day')
+        group       = params.get('group', 'total')
+        errors      = {}
+        if granularity not in self.GRANULARITIES:
+            errors['granularity'] = f'Choose one of: {", ".join(self.GRANULARITIES)}.'
+        if group not in self.GROUPS:
+            errors['group'] = f'Choose one of: {", ".join(self.GROUPS)}.'
+        try:
+            group_id = int(params['id']) if params.get('id') else None
+        except ValueError:
+            errors['id'] = 'Must be an integer id.'
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        end   = _date_param(params, 'to') if params.get('to') else timezone.localdate()
+        start = _date_param(params, 'from') if params.get('from') else end - datetime.timedelta(days=29)
+        if start > end:
+            return Response({'from': 'Must not be after `to`.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        model, key, named = self.GROUPS[group]
+        trunc  = self.GRANULARITIES[granularity]
+        rows   = model.objects.filter(day__gte=start, day__lte=end).order_by()
+        sums   = {'units': Sum('units'), 'revenue': Sum('revenue')}
+        if model is DailySales:
+            sums['orders'] = Sum('orders')
+        if key and group_id is not None:
+            rows = rows.filter(**{key: group_id})
+        rows = (rows.annotate(period=trunc('day') if trunc else F('day'))
+                    .values('period', *([key] if key else [])).annotate(**sums).order_by('period'))
+
+        if key is None:
+            found  = {row['period']: row for row in rows}
+            series = []
+            period = _period_start(start, granularity)
+            while period <= end:
+                row = found.get(period, {'orders': 0, 'units': 0, 'revenue': 0})
+                series.append({'period': period, 'orders': row['orders'], 'units': row['units'],
+                               'revenue': f'{Decimal(row["revenue"]):.2f}'})
+                period = _next_period(period, granularity)
+        else:
+            points = {}
+            for row in rows:
+                points.setdefault(row[key], []).append({
+                    'period': row['period'], 'units': row['units'], 'revenue': f'{Decimal(row["revenue"]):.2f}',
+                })
+            names  = {pk: obj.name for pk, obj in named.objects.in_bulk(points.keys()).items()}
+            series = [{key: pk, 'name': names.get(pk), 'points': pts} for pk, pts in points.items()]
+
+        return Response({'from': start, 'to': end, 'granularity': granularity, 'group': group, 'series': series})
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from .inventory import set_stock
 from .models import Product, Category
 
 @admin.register(Category)
@@ -12,3 +13,9 @@ class ProductAdmin(admin.ModelAdmin):
     list_filter = ('category', 'is_available')
     search_fields = ('name', 'description')
     list_editable = ('price', 'stock', 'is_available')
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if obj.stock_shards and 'stock' in form.changed_data:
+            # The column is only a snapshot; spread the new figure over the shards
+            set_stock(obj.id, obj.stock)
@@ -0,0 +1,39 @@
+from collections import defaultdict
+
+from .models import ProductImage
+
+
+def sync_product_images(images_by_product):
+    """
+    Make each product's images match the given ordered URL lists, writing
+    only the rows that differ: changed URLs are updated in place, surplus
+    rows deleted and missing positions inserted, one statement each.
+    Returns the number of rows written.
+    """
+    if not images_by_product:
+        return 0
+
+    existing = defaultdict(list)
+    for image in ProductImage.objects.filter(product_id__in=images_by_product.keys()).order_by('product_id', 'order', 'id'):
+        existing[image.product_id].append(image)
+
+    to_update, to_create, to_delete = [], [], []
+    for product_id, urls in images_by_product.items():
+        current = existing[product_id]
+        for i, url in enumerate(urls):
+            if i < len(current):
+                image = current[i]
+                if image.url != url or image.order != i:
+                    image.url, image.order = url, i
+                    to_update.append(image)
+            else:
+                to_create.append(ProductImage(product_id=product_id, url=url, order=i))
+        to_delete.extend(image.id for image in current[len(urls):])
+
+    if to_update:
+        ProductImage.objects.bulk_update(to_update, ['url', 'order'])
+    if to_create:
+        ProductImage.objects.bulk_create(to_create)
+    if to_delete:
+        ProductImage.objects.filter(id__in=to_delete).delete()
+    return len(to_update) + len(to_create) + len(to_delete)
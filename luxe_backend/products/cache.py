@@ -0,0 +1,133 @@
+"""
+Versioned response cache for the public catalog endpoints.
+
+Cached responses are keyed by the current catalog version, so any write to
+Product, ProductImage or Category only has to bump the version (see
+signals.py) for every cached page to stop being served. Stale entries
+simply age out.
+
+The same version drives conditional GET: the ETag is a hash of the cache
+key and Last-Modified is the time of the last bump, so revalidation is
+answered with a 304 before any query or serialization runs.
+"""
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+VERSION_KEY           = 'catalog:version'
+MODIFIED_KEY          = 'catalog:modified'
+STATS_KEYS            = {'hits': 'catalog:stats:hits', 'misses': 'catalog:stats:misses'}
+CATALOG_CACHE_TIMEOUT = 60 * 60
+
+# Browsers always revalidate (cheap 304s); shared caches/CDNs may hold a page briefly.
+CACHE_CONTROL = {'public': True, 'max_age': 0, 's_maxage': 30, 'stale_while_revalidate': 60}
+
+
+def _incr(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout=None):
+            return 1
+        return cache.incr(key)
+
+
+def _seed_version():
+    # Seeded from the clock, so a fresh cache (e.g. LocMem after a restart)
+    # never reissues a version, and therefore an ETag, handed out before.
+    return time.time_ns() // 1000
+
+
+def get_catalog_state():
+    """Return (version, last-modified unix timestamp) for the catalog."""
+    state = cache.get_many([VERSION_KEY, MODIFIED_KEY])
+    if VERSION_KEY not in state or MODIFIED_KEY not in state:
+        cache.add(VERSION_KEY, _seed_version(), timeout=None)
+        cache.add(MODIFIED_KEY, time.time(), timeout=None)
+        state = cache.get_many([VERSION_KEY, MODIFIED_KEY])
+    return state[VERSION_KEY], state[MODIFIED_KEY]
+
+
+def get_catalog_version():
+    return get_catalog_state()[0]
+
+
+def _bump():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, _seed_version(), timeout=None)
+    cache.set(MODIFIED_KEY, time.time(), timeout=None)
+
+
+def bump_catalog_version():
+    """Invalidate every cached catalog response once the current transaction commits."""
+    transaction.on_commit(_bump)
+
+
+def catalog_cache_key(request, version):
+    # Present-but-empty params stay in the key: `?cursor=` switches to keyset
+    # pagination, whose body differs from the page-number one
+    params = sorted(
+        (k, v) for k, values in request.query_params.lists() for v in values
+    )
+    return 'catalog:v{}:{}{}?{}'.format(
+        version, request.get_host(), request.path, urlencode(params),
+    )
+
+
+def catalog_cache_stats():
+    stats = cache.get_many(STATS_KEYS.values())
+    hits   = stats.get(STATS_KEYS['hits'], 0)
+    misses = stats.get(STATS_KEYS['misses'], 0)
+    total  = hits + misses
+    return {
+        'version':  get_catalog_version(),
+        'hits':     hits,
+        'misses':   misses,
+        'hit_rate': round(hits / total, 4) if total else None,
+    }
+
+
+class CatalogCacheMixin:
+    """Serve GET from the versioned catalog cache; only 200s are stored."""
+
+    def get_count_cache_namespace(self):
+        return f'catalog:v{get_catalog_version()}'
+
+    def get(self, request, *args, **kwargs):
+        version, modified = get_catalog_state()
+        key  = catalog_cache_key(request, version)
+        etag = '"{}"'.format(hashlib.md5(key.encode()).hexdigest())
+        last_modified = int(modified)
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return self._set_validators(not_modified, etag, last_modified)
+
+        data = cache.get(key)
+        if data is not None:
+            _incr(STATS_KEYS['hits'])
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return self._set_validators(response, etag, last_modified)
+
+        _incr(STATS_KEYS['misses'])
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, CATALOG_CACHE_TIMEOUT)
+            self._set_validators(response, etag, last_modified)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def _set_validators(self, response, etag, last_modified):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, **CACHE_CONTROL)
+        return response
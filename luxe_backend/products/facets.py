@@ -0,0 +1,170 @@
+"""
+Faceted navigation: category counts, a price histogram and min/max price,
+computed for a filtered product queryset in a single GROUP BY query.
+
+The unfiltered facets (all available products) are cached and patched in
+place from Product saves/deletes (see signals.py) instead of being
+recomputed. Changes that can't be applied as a delta, such as removing the
+current cheapest product or moving into an unseen category, drop the entry
+so the next request recomputes it; so does a patch that can't get the
+patch lock.
+"""
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q
+
+UNFILTERED_KEY     = 'catalog:facets:unfiltered'
+UNFILTERED_TIMEOUT = 60 * 60
+PATCH_LOCK_KEY     = 'catalog:facets:unfiltered:lock'
+PATCH_LOCK_TIMEOUT = 5     # seconds; a patch takes microseconds
+PATCH_LOCK_TRIES   = 50    # 10ms apart
+
+# Lower bounds of the price histogram buckets; the last bucket is open-ended.
+PRICE_BUCKETS = [Decimal(b) for b in (0, 10000, 25000, 50000, 100000, 250000)]
+
+
+def _bucket_index(price):
+    index = 0
+    for i, lower in enumerate(PRICE_BUCKETS):
+        if price >= lower:
+            index = i
+    return index
+
+
+def _bucket_filter(i):
+    q = Q(price__gte=PRICE_BUCKETS[i])
+    if i + 1 < len(PRICE_BUCKETS):
+        q &= Q(price__lt=PRICE_BUCKETS[i + 1])
+    return q
+
+
+def compute_facets(qs):
+    """Aggregate `qs` into the internal facet state with one query."""
+    buckets = {f'bucket_{i}': Count('id', filter=_bucket_filter(i)) for i in range(len(PRICE_BUCKETS))}
+    rows = (
+        qs.order_by()
+          .values('category_id', 'category__name', 'category__slug')
+          .annotate(count=Count('id'), min_price=Min('price'), max_price=Max('price'), **buckets)
+    )
+
+    state = {'categories': {}, 'buckets': [0] * len(PRICE_BUCKETS), 'min': None, 'max': None}
+    for row in rows:
+        state['categories'][row['category_id']] = {
+            'name':  row['category__name'],
+            'slug':  row['category__slug'],
+            'count': row['count'],
+        }
+        for i in range(len(PRICE_BUCKETS)):
+            state['buckets'][i] += row[f'bucket_{i}']
+        # SQLite aggregates decimals as floats; keep state in Decimal for exact comparisons
+        low, high = Decimal(str(row['min_price'])), Decimal(str(row['max_price']))
+        if state['min'] is None or low < state['min']:
+            state['min'] = low
+        if state['max'] is None or high > state['max']:
+            state['max'] = high
+    return state
+
+
+def get_unfiltered_facets(base_qs):
+    state = cache.get(UNFILTERED_KEY)
+    if state is None:
+        state = compute_facets(base_qs)
+        cache.set(UNFILTERED_KEY, state, UNFILTERED_TIMEOUT)
+    return state
+
+
+def _money(value):
+    return None if value is None else str(Decimal(value).quantize(Decimal('0.01')))
+
+
+def render_facets(state):
+    categories = [
+        {'id': cat_id, 'name': c['name'], 'slug': c['slug'], 'count': c['count']}
+        for cat_id, c in state['categories'].items() if c['count']
+    ]
+    categories.sort(key=lambda c: (-c['count'], c['name'] or ''))
+
+    histogram = []
+    for i, lower in enumerate(PRICE_BUCKETS):
+        upper = PRICE_BUCKETS[i + 1] if i + 1 < len(PRICE_BUCKETS) else None
+        histogram.append({'min': _money(lower), 'max': _money(upper), 'count': state['buckets'][i]})
+
+    return {
+        'total':      sum(c['count'] for c in categories),
+        'categories': categories,
+        'price': {'min': _money(state['min']), 'max': _money(state['max']), 'histogram': histogram},
+    }
+
+
+# ── Incremental maintenance ──────────────────────────────────────────────────
+
+def facet_key(product):
+    """The fields a product contributes to the unfiltered facets, or None if it contributes nothing."""
+    values = product.__dict__   # avoid loading deferred fields
+    if not values.get('is_available') or values.get('price') is None:
+        return None
+    return (values.get('category_id'), Decimal(str(values['price'])))
+
+
+def invalidate_unfiltered_facets():
+    transaction.on_commit(lambda: cache.delete(UNFILTERED_KEY))
+
+
+def apply_facet_change(old, new):
+    """Patch the cached unfiltered facets for a product moving from `old` to `new` once committed."""
+    if old == new:
+        return
+    transaction.on_commit(lambda: _apply(old, new))
+
+
+def _apply(old, new):
+    # get -> patch -> set is not atomic: serialize patches on a cache.add lock,
+    # and drop the entry rather than risk losing a delta
+    token = uuid.uuid4().hex
+    for _ in range(PATCH_LOCK_TRIES):
+        if cache.add(PATCH_LOCK_KEY, token, PATCH_LOCK_TIMEOUT):
+            break
+        time.sleep(0.01)
+    else:
+        cache.delete(UNFILTERED_KEY)
+        return
+    try:
+        _patch(old, new, token)
+    finally:
+        if cache.get(PATCH_LOCK_KEY) == token:
+            cache.delete(PATCH_LOCK_KEY)
+
+
+def _patch(old, new, token):
+    state = cache.get(UNFILTERED_KEY)
+    if state is None:
+        return
+
+    if old is not None:
+        category_id, price = old
+        category = state['categories'].get(category_id)
+        if category is None or price in (state['min'], state['max']):
+            cache.delete(UNFILTERED_KEY)
+            return
+        category['count'] -= 1
+        state['buckets'][_bucket_index(price)] -= 1
+
+    if new is not None:
+        category_id, price = new
+        category = state['categories'].get(category_id)
+        if category is None:
+            cache.delete(UNFILTERED_KEY)
+            return
+        category['count'] += 1
+        state['buckets'][_bucket_index(price)] += 1
+        state['min'] = price if state['min'] is None else min(state['min'], price)
+        state['max'] = price if state['max'] is None else max(state['max'], price)
+
+    if cache.get(PATCH_LOCK_KEY) == token:
+        cache.set(UNFILTERED_KEY, state, UNFILTERED_TIMEOUT)
+    else:
+        cache.delete(UNFILTERED_KEY)   # held past the lock's timeout; another patch may have run
@@ -0,0 +1,139 @@
+"""
+Image derivative pipeline.
+
+Each source image (a ProductImage URL, Product.image_url or an uploaded
+Product.image) is rendered into fixed-size WebP and JPEG variants under
+MEDIA_ROOT/derivatives/. File names embed a hash of the source bytes, so a
+URL is immutable and DerivativeWhiteNoiseMiddleware can serve it with
+far-future cache headers. The result is stored on the row as
+{'source': <source>, '<variant>': {'webp': path, 'jpeg': path, 'width': w, 'height': h}}
+and only trusted while `source` still matches.
+
+Set IMAGE_SOURCE_DIR to a local directory to resolve remote URLs to files
+named after the URL's last path segment (with or without an extension),
+e.g. for offline runs.
+"""
+import glob
+import hashlib
+import io
+import os
+import posixpath
+from urllib.parse import urlparse
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+
+DERIVATIVE_DIR = 'derivatives'
+
+# name -> bounding box; images are scaled down to fit, never up
+VARIANTS = {
+    'thumb':  (160, 160),
+    'card':   (480, 600),
+    'detail': (1200, 1500),
+}
+FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+FETCH_TIMEOUT   = 15
+MAX_SOURCE_SIZE = 25 * 1024 * 1024
+
+
+class ImageSourceError(Exception):
+    pass
+
+
+def product_image_source(product):
+    """The source a product's own image comes from: the upload, else image_url."""
+    if product.image:
+        return product.image.name
+    return product.image_url or ''
+
+
+def read_source(source, source_dir=None, media_root=None):
+    """Return the bytes of `source`: a MEDIA_ROOT-relative upload, a local stand-in, or a URL."""
+    media_root = media_root or settings.MEDIA_ROOT
+    parsed     = urlparse(source)
+
+    if not parsed.scheme:
+        path = os.path.join(media_root, source)
+        if not os.path.isfile(path):
+            raise ImageSourceError(f'Upload not found: {source}')
+        with open(path, 'rb') as fh:
+            return fh.read()
+
+    if source_dir:
+        name = posixpath.basename(parsed.path.rstrip('/'))
+        candidates = [os.path.join(source_dir, name)] + sorted(glob.glob(os.path.join(source_dir, glob.escape(name) + '.*')))
+        for path in candidates:
+            if os.path.isfile(path):
+                with open(path, 'rb') as fh:
+                    return fh.read()
+        raise ImageSourceError(f'No local stand-in for {source} in {source_dir}')
+
+    if parsed.scheme not in ('http', 'https'):
+        raise ImageSourceError(f'Unsupported image URL: {source}')
+    try:
+        with urlopen(Request(source, headers={'User-Agent': 'luxe-image-pipeline'}), timeout=FETCH_TIMEOUT) as resp:
+            data = resp.read(MAX_SOURCE_SIZE + 1)
+    except OSError as exc:
+        raise ImageSourceError(f'Could not fetch {source}: {exc}')
+    if len(data) > MAX_SOURCE_SIZE:
+        raise ImageSourceError(f'Source image too large: {source}')
+    return data
+
+
+def build_variants(source, source_dir=None, media_root=None):
+    """
+    Render every variant of `source` into MEDIA_ROOT and return the variants
+    dict to store on the row. Files that already exist are left alone, so
+    reruns are cheap. Safe to call from a worker process.
+    """
+    from PIL import Image, ImageOps
+
+    media_root = media_root or settings.MEDIA_ROOT
+    data       = read_source(source, source_dir, media_root)
+    digest     = hashlib.sha256(data).hexdigest()[:20]
+
+    try:
+        original = Image.open(io.BytesIO(data))
+        original = ImageOps.exif_transpose(original).convert('RGB')
+    except Exception as exc:   # Pillow raises a variety of errors for bad input
+        raise ImageSourceError(f'Not a readable image: {source} ({exc})')
+
+    result = {'source': source}
+    for name, box in VARIANTS.items():
+        image = original.copy()
+        image.thumbnail(box, Image.LANCZOS)
+        entry = {'width': image.width, 'height': image.height}
+        for ext, options in FORMATS.items():
+            relative = posixpath.join(DERIVATIVE_DIR, digest[:2], f'{digest}-{name}.{ext}')
+            path     = os.path.join(media_root, *relative.split('/'))
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = f'{path}.{os.getpid()}.tmp'
+                image.save(tmp, **options)
+                os.replace(tmp, path)
+            entry[ext] = relative
+        result[name] = entry
+    return result
+
+
+def variant_urls(variants, source, request=None):
+    """Public URLs for a stored variants dict, or None if it is missing or stale."""
+    if not variants or not source or variants.get('source') != source:
+        return None
+    urls = {}
+    for name in VARIANTS:
+        entry = variants.get(name)
+        if not entry:
+            return None
+        urls[name] = {ext: _media_url(entry[ext], request) for ext in FORMATS}
+        urls[name].update(width=entry['width'], height=entry['height'])
+    return urls
+
+
+def _media_url(relative, request):
+    url = settings.MEDIA_URL + relative
+    return request.build_absolute_uri(url) if request is not None else url
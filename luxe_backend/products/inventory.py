@@ -0,0 +1,178 @@
+"""
+Sharded stock counters for hot products.
+
+A product with stock_shards = N keeps its stock in N StockShard rows instead
+of Product.stock, so concurrent checkouts of one limited edition update
+different rows instead of queueing on a single row lock. A decrement picks
+a random shard, spills over to the others if that one is short, and only
+locks every shard when no single shard can cover the quantity. Reads sum
+the shards, cached briefly. Product.stock is then a snapshot refreshed by
+enable/rebalance/set_stock, and is_available still flips to False when the
+shards reach zero (and back when put_stock returns cancelled units).
+
+Products with stock_shards = 0 (the default) are untouched by this module.
+"""
+import random
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, OuterRef, Subquery, Sum, When
+from django.db.models.functions import Coalesce
+
+from .cache import bump_catalog_version
+from .facets import invalidate_unfiltered_facets
+from .models import Product, StockShard
+
+STOCK_CACHE_TIMEOUT = 5   # seconds; writes also clear it
+
+
+def _cache_key(product_id):
+    return f'product:{product_id}:stock'
+
+
+def _clear_cached(product_id):
+    transaction.on_commit(lambda: cache.delete(_cache_key(product_id)))
+
+
+def _stock_written(product_id):
+    # update()/bulk writes send no signals: the catalog shows stock
+    _clear_cached(product_id)
+    bump_catalog_version()
+
+
+def _sum(product_id):
+    return StockShard.objects.filter(product_id=product_id).aggregate(total=Sum('stock', default=0))['total']
+
+
+def shard_total(product_id):
+    """Sum of a sharded product's counters, cached for STOCK_CACHE_TIMEOUT seconds."""
+    key   = _cache_key(product_id)
+    total = cache.get(key)
+    if total is None:
+        total = _sum(product_id)
+        cache.set(key, total, STOCK_CACHE_TIMEOUT)
+    return total
+
+
+def current_stock(product):
+    """A product's sellable stock: the column, or the (cached) shard sum when sharded."""
+    return shard_total(product.id) if product.stock_shards else product.stock
+
+
+def effective_stock_expression(product_ref='pk'):
+    """SQL expression for a product's stock that reads the shards when it is sharded."""
+    shard_sum = Subquery(
+        StockShard.objects.filter(product_id=OuterRef(product_ref)).order_by()
+        .values('product_id').annotate(total=Sum('stock')).values('total')[:1]
+    )
+    return Case(When(stock_shards__gt=0, then=Coalesce(shard_sum, 0)), default=F('stock'))
+
+
+# ── Writes ──────────────────────────────────────────────────────────────────
+
+def _distribute(total, shards):
+    base, extra = divmod(total, shards)
+    return [base + (1 if i < extra else 0) for i in range(shards)]
+
+
+def set_stock(product_id, total, shards=None):
+    """
+    Spread `total` evenly over the product's shards (or `shards` new ones) and
+    record it as the snapshot. Used to enable sharding, rebalance, and when an
+    admin sets the stock of a sharded product.
+    """
+    with transaction.atomic():
+        product = Product.objects.select_for_update().get(id=product_id)
+        shards  = shards or product.stock_shards
+        if not shards:
+            raise ValueError(f'Product {product_id} is not sharded.')
+        StockShard.objects.filter(product_id=product_id, shard__gte=shards).delete()
+        StockShard.objects.bulk_create(
+            [StockShard(product_id=product_id, shard=i, stock=n) for i, n in enumerate(_distribute(total, shards))],
+            update_conflicts=True, unique_fields=['product', 'shard'], update_fields=['stock'],
+        )
+        Product.objects.filter(id=product_id).update(stock=total, stock_shards=shards)
+        _stock_written(product_id)
+
+
+def enable_sharding(product_id, shards):
+    with transaction.atomic():
+        product = Product.objects.select_for_update().get(id=product_id)
+        total   = _sum(product_id) if product.stock_shards else product.stock
+        set_stock(product_id, total, shards)
+
+
+def disable_sharding(product_id):
+    """Fold the shards back into Product.stock."""
+    with transaction.atomic():
+        Product.objects.select_for_update().get(id=product_id)
+        total = _sum(product_id)
+        StockShard.objects.filter(product_id=product_id).delete()
+        Product.objects.filter(id=product_id).update(stock=total, stock_shards=0)
+        _stock_written(product_id)
+
+
+def rebalance(product_id):
+    """Even out the shards (decrements drain them unevenly) and refresh the snapshot."""
+    with transaction.atomic():
+        Product.objects.select_for_update().get(id=product_id)   # same lock order as set_stock
+        rows  = list(StockShard.objects.select_for_update().filter(product_id=product_id))
+        total = sum(row.stock for row in rows)
+        set_stock(product_id, total)
+    return total
+
+
+def take_stock(product_id, shards, quantity):
+    """
+    Remove `quantity` from a sharded product. Returns False (changing nothing)
+    if the shards hold less than that in total. Flips is_available off when
+    the last unit goes.
+    """
+    order = random.sample(range(shards), shards)
+    for shard in order:
+        # Random shard first, then spill over to the others
+        if StockShard.objects.filter(product_id=product_id, shard=shard, stock__gte=quantity) \
+                             .update(stock=F('stock') - quantity):
+            break
+    else:
+        # No single shard has enough: take it across shards under lock
+        with transaction.atomic():
+            rows = list(StockShard.objects.select_for_update().filter(product_id=product_id).order_by('shard'))
+            if sum(row.stock for row in rows) < quantity:
+                return False
+            remaining = quantity
+            for row in sorted(rows, key=lambda r: -r.stock):
+                taken      = min(row.stock, remaining)
+                row.stock -= taken
+                remaining -= taken
+            StockShard.objects.bulk_update(rows, ['stock'])
+
+    _clear_cached(product_id)
+    if not StockShard.objects.filter(product_id=product_id, stock__gt=0).exists():
+        _mark_sold_out(product_id)
+    return True
+
+
+def _mark_sold_out(product_id):
+    """
+    Take a product whose shards look empty off sale. The shards are checked
+    again under their row locks: a put_stock that landed in between keeps it
+    on sale, and one still to come waits for this flip and then reverses it.
+    """
+    with transaction.atomic():
+        if any(row.stock for row in StockShard.objects.select_for_update().filter(product_id=product_id)):
+            return
+        if Product.objects.filter(id=product_id, is_available=True).update(is_available=False, stock=0):
+            invalidate_unfiltered_facets()
+
+
+def put_stock(product_id, shards, quantity):
+    """
+    Return `quantity` to a sharded product (cancelled orders), all on one
+    random shard. A product that sold out comes back on sale. Returns True
+    if is_available flipped.
+    """
+    StockShard.objects.filter(product_id=product_id, shard=random.randrange(shards)) \
+                      .update(stock=F('stock') + quantity)
+    _clear_cached(product_id)
+    return bool(Product.objects.filter(id=product_id, is_available=False, stock=0).update(is_available=True))
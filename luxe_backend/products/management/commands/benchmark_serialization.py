@@ -0,0 +1,84 @@
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from products.models import Category, Product, ProductImage
+from products.serializers import ProductProjection, ProductSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare ProductSerializer with the lean ?fields= projection: time to build and '
+        'render a page, and payload size, at several page sizes. Seeds its own products '
+        'in a rolled-back transaction.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='12,100,1000', help='Comma-separated page sizes')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per case (median is reported)')
+        parser.add_argument('--fields', default='id,name,price,primary_image',
+                            help='Field list for the lean projection')
+
+    def handle(self, *args, **opts):
+        sizes  = [int(s) for s in opts['sizes'].split(',') if s.strip()]
+        fields = [f.strip() for f in opts['fields'].split(',') if f.strip()]
+        render = JSONRenderer().render
+
+        self.stdout.write(f'  {"items":>6}  {"serializer":>12}  {"projection":>12}  {"speedup":>7}  '
+                          f'{"bytes (full)":>13}  {"bytes (lean)":>13}')
+        try:
+            with transaction.atomic():
+                self._seed(max(sizes))
+                base = Product.objects.filter(sku__startswith='bench-').order_by('-created_at', '-id')
+
+                for size in sizes:
+                    def full():
+                        rows = list(base.with_related()[:size])
+                        return render(ProductSerializer(rows, many=True).data)
+
+                    def lean():
+                        projection = ProductProjection(fields)
+                        return render(projection.render(projection.queryset(base)[:size]))
+
+                    full_ms, full_body = self._time(full, opts['repeat'])
+                    lean_ms, lean_body = self._time(lean, opts['repeat'])
+                    self.stdout.write(
+                        f'  {size:>6}  {full_ms:>10.1f}ms  {lean_ms:>10.1f}ms  {full_ms / lean_ms:>6.1f}x  '
+                        f'{len(full_body):>13,}  {len(lean_body):>13,}'
+                    )
+                raise Rollback
+        except Rollback:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f'\n✓ Benchmarked lean fields: {", ".join(fields)}'))
+
+    def _time(self, fn, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            body = fn()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), body
+
+    def _seed(self, count):
+        category = Category.objects.create(name='Benchmark', slug='benchmark-serialization')
+        Product.objects.bulk_create([
+            Product(
+                sku=f'bench-{i}', name=f'Benchmark Product {i}', description='Seeded for benchmarking. ' * 8,
+                price=Decimal(1000 + i), category=category, stock=10,
+            )
+            for i in range(count)
+        ], batch_size=1000)
+        ids = Product.objects.filter(sku__startswith='bench-').values_list('id', flat=True)
+        ProductImage.objects.bulk_create([
+            ProductImage(product_id=pid, url=f'https://images.example.com/{pid}-{n}.jpg', order=n)
+            for pid in ids for n in range(3)
+        ], batch_size=1000)
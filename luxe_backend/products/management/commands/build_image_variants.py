@@ -0,0 +1,86 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from products.cache import bump_catalog_version
+from products.images import ImageSourceError, build_variants, product_image_source
+from products.models import Product, ProductImage
+
+
+def _render(source, source_dir, media_root):
+    """Worker entry point: returns (source, variants, error)."""
+    try:
+        return source, build_variants(source, source_dir, media_root), None
+    except ImageSourceError as exc:
+        return source, None, str(exc)
+
+
+class Command(BaseCommand):
+    help = (
+        'Fetch product images (or read uploads / a local stand-in directory) and render '
+        'thumb/card/detail WebP+JPEG derivatives into MEDIA_ROOT using a process pool.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+        parser.add_argument('--source-dir', default=settings.IMAGE_SOURCE_DIR,
+                            help='Local directory standing in for remote image URLs')
+        parser.add_argument('--batch-size', type=int, default=200, help='Distinct sources per batch')
+        parser.add_argument('--force', action='store_true', help='Rebuild even if variants are current')
+
+    def handle(self, *args, **opts):
+        # source -> rows that use it; identical URLs are rendered once
+        pending = {}
+        for image in ProductImage.objects.only('id', 'url', 'variants').iterator(chunk_size=2000):
+            if opts['force'] or image.variants.get('source') != image.url:
+                pending.setdefault(image.url, []).append(image)
+        for product in Product.objects.only('id', 'image', 'image_url', 'image_variants').iterator(chunk_size=2000):
+            source = product_image_source(product)
+            if source and (opts['force'] or product.image_variants.get('source') != source):
+                pending.setdefault(source, []).append(product)
+
+        if not pending:
+            self.stdout.write(self.style.SUCCESS('✓ All image variants are up to date'))
+            return
+
+        self.stdout.write(f'  {len(pending)} source image(s) to process with {opts["workers"]} worker(s)')
+        started, built, failed = time.monotonic(), 0, 0
+        sources = iter(list(pending))
+
+        with ProcessPoolExecutor(max_workers=opts['workers']) as pool:
+            while True:
+                batch = list(islice(sources, opts['batch_size']))
+                if not batch:
+                    break
+                futures = [
+                    pool.submit(_render, source, opts['source_dir'], str(settings.MEDIA_ROOT))
+                    for source in batch
+                ]
+                images, products = [], []
+                for future in as_completed(futures):
+                    source, variants, error = future.result()
+                    if error:
+                        failed += 1
+                        self.stderr.write(f'  [failed] {error}')
+                        continue
+                    built += 1
+                    for row in pending.pop(source):
+                        if isinstance(row, ProductImage):
+                            row.variants = variants
+                            images.append(row)
+                        else:
+                            row.image_variants = variants
+                            products.append(row)
+
+                ProductImage.objects.bulk_update(images, ['variants'], batch_size=500)
+                Product.objects.bulk_update(products, ['image_variants'], batch_size=500)
+                # bulk_update sends no signals
+                bump_catalog_version()
+                self.stdout.write(f'  {built + failed} processed ({built / (time.monotonic() - started):,.1f} images/s)')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✓ {built} image(s) rendered, {failed} failed in {time.monotonic() - started:.1f}s'
+        ))
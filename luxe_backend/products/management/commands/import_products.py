@@ -0,0 +1,226 @@
+import csv
+import hashlib
+import json
+import os
+import time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.text import slugify
+from accounts.counters import increment
+from products.cache import bump_catalog_version
+from products.facets import invalidate_unfiltered_facets
+from products.inventory import set_stock
+from products.models import Product, Category, ProductImage
+from products.search import index_products
+
+UPDATE_FIELDS = ['name', 'description', 'price', 'image_url', 'category', 'stock', 'is_available', 'updated_at']
+
+SKU_MAX_LENGTH    = Product._meta.get_field('sku').max_length
+CATEGORY_NAME_MAX = Category._meta.get_field('name').max_length
+CATEGORY_SLUG_MAX = Category._meta.get_field('slug').max_length
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream products from a CSV or JSONL feed and upsert them by SKU in batches.\n'
+        'Columns/keys: sku, name, description, price, stock, category, image_url, '
+        'image_urls (list, or "|"-separated in CSV), is_available.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Run every batch and roll it back')
+        parser.add_argument('--checkpoint', help='Checkpoint file (default: <path>.checkpoint)')
+        parser.add_argument('--resume', action='store_true', help='Skip rows already committed per the checkpoint')
+
+    def handle(self, *args, **opts):
+        path = opts['path']
+        if not os.path.exists(path):
+            raise CommandError(f'File not found: {path}')
+        fmt        = opts['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        batch_size = opts['batch_size']
+        dry_run    = opts['dry_run']
+        checkpoint = opts['checkpoint'] or f'{path}.checkpoint'
+
+        offset = 0
+        if opts['resume'] and os.path.exists(checkpoint):
+            with open(checkpoint) as fh:
+                offset = int(fh.read().strip() or 0)
+            self.stdout.write(f'  Resuming after row {offset}')
+
+        totals  = {'rows': 0, 'upserted': 0, 'images': 0, 'skipped': 0}
+        started = time.monotonic()
+
+        with open(path, newline='', encoding='utf-8') as fh:
+            rows = islice(self._read(fh, fmt), offset, None)
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                stats = self._import_batch(batch, dry_run)
+                offset += len(batch)
+                for key in totals:
+                    totals[key] += stats.get(key, 0)
+                if not dry_run:
+                    self._write_checkpoint(checkpoint, offset)
+
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f'  {offset} rows  ({totals["rows"] / elapsed:,.0f} rows/s, '
+                    f'{totals["skipped"]} skipped)'
+                )
+
+        elapsed = time.monotonic() - started
+        prefix  = '[dry run] ' if dry_run else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✓ {prefix}{totals["upserted"]} products, {totals["images"]} images upserted, '
+            f'{totals["skipped"]} rows skipped in {elapsed:.1f}s '
+            f'({totals["rows"] / elapsed if elapsed else 0:,.0f} rows/s)'
+        ))
+
+    # ── reading ─────────────────────────────────────────────────────────────
+
+    def _read(self, fh, fmt):
+        if fmt == 'csv':
+            for row in csv.DictReader(fh):
+                urls = row.get('image_urls')
+                row['image_urls'] = [u for u in urls.split('|') if u] if urls else None
+                yield row
+        else:
+            for line in fh:
+                line = line.strip()
+                if line:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        yield {}   # counted as skipped, keeps offsets aligned with lines
+
+    def _parse(self, row):
+        sku  = str(row.get('sku') or '').strip()
+        name = str(row.get('name') or '').strip()
+        if not sku or not name or len(sku) > SKU_MAX_LENGTH:
+            return None
+        try:
+            price = Decimal(str(row.get('price')))
+            stock = int(row.get('stock') or 0)
+        except (InvalidOperation, TypeError, ValueError):
+            return None
+        if not price.is_finite() or price < 0 or stock < 0:   # 'NaN' and 'Infinity' parse as Decimals
+            return None
+
+        available = row.get('is_available')
+        if available in (None, ''):
+            available = stock > 0
+        elif isinstance(available, str):
+            available = available.strip().lower() in ('1', 'true', 'yes')
+
+        return {
+            'sku':          sku,
+            'name':         name[:200],
+            'description':  row.get('description') or '',
+            'price':        price,
+            'stock':        stock,
+            'is_available': bool(available) and stock > 0,
+            'image_url':    row.get('image_url') or '',
+            'category':     (row.get('category') or '').strip(),
+            'image_urls':   row.get('image_urls'),
+        }
+
+    # ── writing ─────────────────────────────────────────────────────────────
+
+    def _import_batch(self, raw_rows, dry_run):
+        parsed = {}
+        for raw in raw_rows:
+            row = self._parse(raw)
+            if row is not None:
+                parsed[row['sku']] = row   # last occurrence of a SKU in a batch wins
+        stats = {'rows': len(raw_rows), 'skipped': len(raw_rows) - len(parsed)}
+        if not parsed:
+            return stats
+
+        with transaction.atomic():
+            categories = self._resolve_categories({r['category'] for r in parsed.values() if r['category']})
+            unresolved = [sku for sku, r in parsed.items() if r['category'] and r['category'] not in categories]
+            for sku in unresolved:
+                del parsed[sku]
+            stats['skipped'] += len(unresolved)
+            existing   = Product.objects.filter(sku__in=parsed.keys()).count()
+
+            Product.objects.bulk_create(
+                [
+                    Product(
+                        sku=r['sku'], name=r['name'], description=r['description'], price=r['price'],
+                        stock=r['stock'], is_available=r['is_available'], image_url=r['image_url'],
+                        category=categories.get(r['category']),
+                    )
+                    for r in parsed.values()
+                ],
+                update_conflicts=True,
+                unique_fields=['sku'],
+                update_fields=UPDATE_FIELDS,
+            )
+            ids = dict(Product.objects.filter(sku__in=parsed.keys()).values_list('sku', 'id'))
+            increment('products', len(ids) - existing)   # the upsert sends no signals
+            for sku, pid in Product.objects.filter(id__in=ids.values(), stock_shards__gt=0).values_list('sku', 'id'):
+                set_stock(pid, parsed[sku]['stock'])   # the upsert only wrote the snapshot
+
+            with_images = {ids[sku]: r['image_urls'] for sku, r in parsed.items() if r['image_urls'] is not None}
+            if with_images:
+                ProductImage.objects.filter(product_id__in=with_images.keys()).delete()
+                ProductImage.objects.bulk_create([
+                    ProductImage(product_id=pid, url=url, order=i)
+                    for pid, urls in with_images.items()
+                    for i, url in enumerate(urls)
+                ])
+
+            # bulk writes send no signals; keep the search index and catalog caches in step
+            index_products(ids.values())
+            bump_catalog_version()
+            invalidate_unfiltered_facets()
+            stats['upserted'] = len(ids)
+            stats['images']   = sum(len(urls) for urls in with_images.values())
+
+            if dry_run:
+                transaction.set_rollback(True)
+        return stats
+
+    def _category_slug(self, name):
+        # Names that slugify to nothing get a slug derived from the name, the same in every batch
+        return slugify(name)[:CATEGORY_SLUG_MAX] or f'category-{hashlib.md5(name.encode()).hexdigest()[:12]}'
+
+    def _resolve_categories(self, names):
+        """
+        Map category names to Category rows (a few lookups per batch). A name
+        with no row of its own takes the category its slug belongs to
+        ('WATCHES' -> 'Watches'); only names matching neither are created.
+        Names left out of the result (too long for the column) skip their rows.
+        """
+        names = {n for n in names if len(n) <= CATEGORY_NAME_MAX}
+        if not names:
+            return {}
+        found = {c.name: c for c in Category.objects.filter(name__in=names)}
+        slugs = {n: self._category_slug(n) for n in names - found.keys()}
+        if slugs:
+            by_slug = {c.slug: c for c in Category.objects.filter(slug__in=slugs.values())}
+            new     = {}
+            for name, slug in slugs.items():
+                if slug not in by_slug:
+                    new.setdefault(slug, name)   # names sharing a slug become one category
+            if new:
+                # A concurrent import may create the same ones; the slug lookup below picks those up
+                Category.objects.bulk_create([Category(name=n, slug=slug) for slug, n in new.items()],
+                                             ignore_conflicts=True)
+                by_slug.update({c.slug: c for c in Category.objects.filter(slug__in=new.keys())})
+            found.update({name: by_slug[slug] for name, slug in slugs.items() if slug in by_slug})
+        return found
+
+    def _write_checkpoint(self, checkpoint, offset):
+        tmp = f'{checkpoint}.tmp'
+        with open(tmp, 'w') as fh:
+            fh.write(str(offset))
+        os.replace(tmp, checkpoint)
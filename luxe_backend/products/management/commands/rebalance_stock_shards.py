@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from products.inventory import rebalance
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        'Even out the stock shards of sharded products (random decrements drain them unevenly, '
+        'which pushes checkouts onto the slower locked path) and refresh Product.stock. '
+        'Safe to run from cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('product_ids', nargs='*', type=int, help='Default: every sharded product')
+
+    def handle(self, *args, **opts):
+        products = Product.objects.filter(stock_shards__gt=0).order_by('id')
+        if opts['product_ids']:
+            products = products.filter(id__in=opts['product_ids'])
+
+        count = 0
+        for product_id in products.values_list('id', flat=True):
+            total = rebalance(product_id)
+            count += 1
+            self.stdout.write(f'  #{product_id}: {total} unit(s)')
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebalanced {count} sharded product(s)'))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from products.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text product search index'
+
+    def handle(self, *args, **kwargs):
+        vendor = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'✓ Search index rebuilt ({vendor})'))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from products.inventory import disable_sharding, enable_sharding
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        'Switch products to sharded stock counters (stock split over N rows, so concurrent '
+        'checkouts of a hot product stop queueing on one row lock), or back with --disable.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('product_ids', nargs='+', type=int)
+        group = parser.add_mutually_exclusive_group(required=True)
+        group.add_argument('--shards', type=int, help='Number of counters per product (2-64)')
+        group.add_argument('--disable', action='store_true', help='Fold the shards back into Product.stock')
+
+    def handle(self, *args, **opts):
+        ids     = opts['product_ids']
+        missing = set(ids) - set(Product.objects.filter(id__in=ids).values_list('id', flat=True))
+        if missing:
+            raise CommandError(f'Unknown product id(s): {", ".join(map(str, sorted(missing)))}')
+        if not opts['disable'] and not 2 <= opts['shards'] <= 64:
+            raise CommandError('--shards must be between 2 and 64.')
+
+        for product_id in ids:
+            if opts['disable']:
+                disable_sharding(product_id)
+            else:
+                enable_sharding(product_id, opts['shards'])
+
+        mode = 'plain stock' if opts['disable'] else f'{opts["shards"]} stock shards'
+        self.stdout.write(self.style.SUCCESS(f'✓ {len(ids)} product(s) now on {mode}'))
@@ -0,0 +1,40 @@
+import os
+from urllib.parse import urlparse
+
+from django.conf import settings
+from whitenoise.middleware import WhiteNoiseMiddleware
+from whitenoise.string_utils import ensure_leading_trailing_slash
+
+from .images import DERIVATIVE_DIR
+
+
+class DerivativeWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise that also serves the image derivatives in MEDIA_ROOT.
+
+    Derivatives are written after startup, so an unseen URL under the
+    derivatives prefix is looked up on disk once and then remembered. Their
+    names are content-hashed, so they are always sent as immutable.
+    """
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings=settings)
+        media_prefix = urlparse(settings.MEDIA_URL or '').path
+        self.derivative_prefix = ensure_leading_trailing_slash(media_prefix.rstrip('/') + '/' + DERIVATIVE_DIR)
+        self.derivative_root   = os.path.join(os.path.realpath(settings.MEDIA_ROOT), DERIVATIVE_DIR) + os.sep
+
+    def __call__(self, request):
+        url = request.path_info
+        # path_info is already percent-decoded: refuse `..` and doubled slashes
+        # outright, and check the resolved path, since path_is_child_of only
+        # compares strings
+        if url.startswith(self.derivative_prefix) and url not in self.files and self.url_is_canonical(url):
+            path = os.path.realpath(os.path.join(self.derivative_root, url[len(self.derivative_prefix):]))
+            if self.path_is_child_of(path, self.derivative_root) and os.path.isfile(path):
+                self.files[url] = self.get_static_file(path, url)
+        return super().__call__(request)
+
+    def immutable_file_test(self, path, url):
+        if url.startswith(self.derivative_prefix):
+            return True
+        return super().immutable_file_test(path, url)
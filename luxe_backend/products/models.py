@@ -12,20 +12,45 @@ class Category(models.Model):
         return self.name
 
 
+class ProductQuerySet(models.QuerySet):
+    def with_related(self):
+        """
+        Join the category, prefetch images and sum sharded stock in SQL, so
+        serialization adds no per-row queries.
+        """
+        from .inventory import effective_stock_expression   # inventory imports this module
+        return self.select_related('category').prefetch_related('images') \
+                   .annotate(effective_stock=effective_stock_expression())
+
+
 class Product(models.Model):
+    sku          = models.CharField(max_length=64, unique=True, null=True, blank=True)   # supplier key for imports
     name         = models.CharField(max_length=200)
     description  = models.TextField()
     price        = models.DecimalField(max_digits=10, decimal_places=2)
     image        = models.ImageField(upload_to='products/', blank=True, null=True)
     image_url    = models.URLField(blank=True)   # legacy single image fallback
+    image_variants = models.JSONField(default=dict, blank=True)   # derivatives of image/image_url, see images.py
     category     = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='products')
-    stock        = models.PositiveIntegerField(default=0)
+    stock        = models.PositiveIntegerField(default=0)   # snapshot only when stock_shards > 0, see inventory.py
+    stock_shards = models.PositiveSmallIntegerField(default=0)   # 0 = plain stock column
     is_available = models.BooleanField(default=True)
     created_at   = models.DateTimeField(auto_now_add=True)
     updated_at   = models.DateTimeField(auto_now=True)
 
+    objects = ProductQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        # Catalog reads only touch available products: newest first, by price,
+        # or per category + price range. Partial indexes stay small, and Django
+        # renders is_available=True as a bare column that a composite index
+        # prefix couldn't match anyway.
+        indexes  = [
+            models.Index(fields=['created_at'], condition=models.Q(is_available=True), name='product_avail_created_idx'),
+            models.Index(fields=['price'], condition=models.Q(is_available=True), name='product_avail_price_idx'),
+            models.Index(fields=['category', 'price'], condition=models.Q(is_available=True), name='product_avail_cat_price_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -43,11 +68,27 @@ class Product(models.Model):
             self.save(update_fields=['is_available'])
 
 
+class StockShard(models.Model):
+    """One of a sharded product's stock counters; the product's stock is their sum."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_shard_rows')
+    shard   = models.PositiveSmallIntegerField()
+    stock   = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'shard'], name='stock_shard_product_shard_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}#{self.shard}: {self.stock}"
+
+
 class ProductImage(models.Model):
     """Multiple images per product (stored as URLs)."""
     product  = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='images')
     url      = models.URLField()
     order    = models.PositiveIntegerField(default=0)   # display order
+    variants = models.JSONField(default=dict, blank=True)   # derivatives of url, see images.py
 
     class Meta:
         ordering = ['order']
@@ -0,0 +1,104 @@
+"""
+Full-text product search.
+
+SQLite uses an FTS5 table keyed by product id, kept in sync from Product
+saves and deletes (see signals.py) and by index_products() for bulk writes.
+PostgreSQL uses a GIN index over a weighted tsvector expression, which the
+database maintains itself. Both are created by migration 0003; any other
+backend falls back to icontains.
+"""
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'products_product_fts'
+PG_INDEX  = 'products_product_search_idx'
+
+# Name matches outrank description matches on both backends.
+PG_VECTOR = (
+    "setweight(to_tsvector('english', coalesce({table}name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce({table}description, '')), 'B')"
+)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _fts5_query(term):
+    """Turn free text into a safe FTS5 prefix query: "royal"* "chrono"*"""
+    return ' '.join(f'"{tok}"*' for tok in _TOKEN_RE.findall(term))
+
+
+def search_products(qs, term):
+    """
+    Filter `qs` to products matching `term` and annotate `search_rank`
+    (higher is more relevant). Composes with any other filters on `qs`.
+    """
+    vendor = connection.vendor
+
+    if vendor == 'sqlite':
+        match = _fts5_query(term)
+        if not match:
+            return qs.annotate(search_rank=Value(0.0, output_field=FloatField())).none()
+        return qs.filter(RawSQL(
+            f'products_product.id IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)',
+            [match], output_field=BooleanField(),
+        )).annotate(search_rank=RawSQL(
+            f'(SELECT -bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = products_product.id)',
+            [match], output_field=FloatField(),
+        ))
+
+    if vendor == 'postgresql':
+        vector = PG_VECTOR.format(table='products_product.')
+        return qs.filter(RawSQL(
+            f"({vector}) @@ websearch_to_tsquery('english', %s)",
+            [term], output_field=BooleanField(),
+        )).annotate(search_rank=RawSQL(
+            f"ts_rank({vector}, websearch_to_tsquery('english', %s))",
+            [term], output_field=FloatField(),
+        ))
+
+    return qs.filter(
+        Q(name__icontains=term) | Q(description__icontains=term)
+    ).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def index_products(product_ids):
+    """(Re)index the given products. Only SQLite keeps a separate index table."""
+    product_ids = list(product_ids)
+    if connection.vendor != 'sqlite' or not product_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(product_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', product_ids)
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE}(rowid, name, description) '
+            f'SELECT id, name, description FROM products_product WHERE id IN ({placeholders})',
+            product_ids,
+        )
+
+
+def unindex_products(product_ids):
+    product_ids = list(product_ids)
+    if connection.vendor != 'sqlite' or not product_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(product_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', product_ids)
+
+
+def rebuild_index():
+    """Rebuild the search index from scratch. Returns the backend name."""
+    vendor = connection.vendor
+    with connection.cursor() as cursor:
+        if vendor == 'sqlite':
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE}(rowid, name, description) '
+                f'SELECT id, name, description FROM products_product'
+            )
+        elif vendor == 'postgresql':
+            cursor.execute(f'REINDEX INDEX {PG_INDEX}')
+    return vendor
@@ -1,4 +1,11 @@
+from django.db.models import CharField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, NullIf
 from rest_framework import serializers
+from luxe_backend.projection import Projection
+from .bulk import sync_product_images
+from .cache import bump_catalog_version
+from .images import product_image_source, variant_urls
+from .inventory import effective_stock_expression, set_stock, shard_total
 from .models import Product, Category, ProductImage
 
 
@@ -9,9 +16,15 @@ class CategorySerializer(serializers.ModelSerializer):
 
 
 class ProductImageSerializer(serializers.ModelSerializer):
+    # Resized WebP/JPEG URLs per size, or null until build_image_variants has run
+    variants = serializers.SerializerMethodField()
+
     class Meta:
         model  = ProductImage
-        fields = ('id', 'url', 'order')
+        fields = ('id', 'url', 'order', 'variants')
+
+    def get_variants(self, obj):
+        return variant_urls(obj.variants, obj.url, self.context.get('request'))
 
 
 class ProductSerializer(serializers.ModelSerializer):
@@ -28,35 +41,110 @@ class ProductSerializer(serializers.ModelSerializer):
     )
     # Computed: first image to use as thumbnail
     primary_image = serializers.SerializerMethodField()
+    primary_variants = serializers.SerializerMethodField()
 
     class Meta:
         model  = Product
         fields = (
-            'id', 'name', 'description', 'price',
-            'image_url', 'image_urls', 'images', 'primary_image',
+            'id', 'sku', 'name', 'description', 'price',
+            'image', 'image_url', 'image_urls', 'images', 'primary_image', 'primary_variants',
             'category', 'category_id',
             'stock', 'is_available', 'created_at',
         )
 
     def get_primary_image(self, obj):
+        # Index the (usually prefetched) list instead of exists()/first(),
+        # which would each issue a fresh query per product.
         imgs = obj.images.all()
-        if imgs.exists():
-            return imgs.first().url
+        if imgs:
+            return imgs[0].url
         return obj.image_url or None
 
+    def get_primary_variants(self, obj):
+        request = self.context.get('request')
+        imgs = obj.images.all()
+        if imgs:
+            return variant_urls(imgs[0].variants, imgs[0].url, request)
+        return variant_urls(obj.image_variants, product_image_source(obj), request)
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if instance.stock_shards:
+            # Annotated by with_related(); the cached shard sum otherwise
+            stock = getattr(instance, 'effective_stock', None)
+            data['stock'] = shard_total(instance.id) if stock is None else stock
+        return data
+
     def create(self, validated_data):
         image_urls = validated_data.pop('image_urls', [])
         product    = super().create(validated_data)
-        for i, url in enumerate(image_urls):
-            ProductImage.objects.create(product=product, url=url, order=i)
+        if image_urls:
+            ProductImage.objects.bulk_create([
+                ProductImage(product=product, url=url, order=i)
+                for i, url in enumerate(image_urls)
+            ])
+            # bulk_create sends no signals
+            bump_catalog_version()
         return product
 
     def update(self, instance, validated_data):
         image_urls = validated_data.pop('image_urls', None)
         product    = super().update(instance, validated_data)
+        if product.stock_shards and 'stock' in validated_data:
+            # The column is only a snapshot; spread the new figure over the shards
+            set_stock(product.id, validated_data['stock'])
+            product.effective_stock = validated_data['stock']
         if image_urls is not None:
-            # Replace all images
-            product.images.all().delete()
-            for i, url in enumerate(image_urls):
-                ProductImage.objects.create(product=product, url=url, order=i)
-        return product
\ No newline at end of file
+            # Only rewrite the images that actually changed
+            if sync_product_images({product.id: image_urls}):
+                bump_catalog_version()
+        return product
+
+
+class BulkProductUpdateSerializer(serializers.Serializer):
+    """One entry of PATCH /api/admin/products/bulk/ — every field but id is optional."""
+    id           = serializers.IntegerField()
+    name         = serializers.CharField(max_length=200, required=False)
+    description  = serializers.CharField(required=False)
+    price        = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    stock        = serializers.IntegerField(min_value=0, required=False)
+    is_available = serializers.BooleanField(required=False)
+    image_url    = serializers.URLField(required=False, allow_blank=True)
+    category_id  = serializers.IntegerField(required=False, allow_null=True)
+    image_urls   = serializers.ListField(child=serializers.URLField(), required=False)
+
+
+class ProductProjection(Projection):
+    """Lean ?fields= / ?expand= representation of ProductListView rows."""
+    fields = {
+        'id':            'id',
+        'sku':           'sku',
+        'name':          'name',
+        'description':   'description',
+        'price':         'price',
+        'image_url':     'image_url',
+        # Same rule as ProductSerializer.get_primary_image, resolved in SQL
+        'primary_image': Coalesce(
+            Subquery(ProductImage.objects.filter(product=OuterRef('pk')).order_by('order', 'id').values('url')[:1]),
+            NullIf('image_url', Value('')),
+            output_field=CharField(),
+        ),
+        'stock':         effective_stock_expression(),
+        'is_available':  'is_available',
+        'created_at':    'created_at',
+    }
+    relations   = {'category': {'id': 'category__id', 'name': 'category__name', 'slug': 'category__slug'}}
+    collections = ('images',)
+
+    def fetch_images(self, ids):
+        images = {}
+        rows = (ProductImage.objects.filter(product_id__in=ids)
+                .order_by('order', 'id').values('product_id', 'id', 'url', 'order', 'variants'))
+        for row in rows:
+            images.setdefault(row['product_id'], []).append({
+                'id':       row['id'],
+                'url':      row['url'],
+                'order':    row['order'],
+                'variants': variant_urls(row['variants'], row['url'], self.request),
+            })
+        return images
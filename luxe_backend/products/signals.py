@@ -0,0 +1,68 @@
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from accounts.counters import decrement, increment
+from .cache import bump_catalog_version
+from .facets import apply_facet_change, facet_key, invalidate_unfiltered_facets
+from .models import Category, Product, ProductImage
+from .search import index_products, unindex_products
+
+SEARCH_FIELDS = {'name', 'description'}
+
+
+@receiver(post_save, sender=Product)
+def reindex_product(sender, instance, created, update_fields=None, **kwargs):
+    # Stock/availability-only saves don't touch the searchable text
+    if update_fields is not None and not SEARCH_FIELDS & set(update_fields):
+        return
+    index_products([instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    unindex_products([instance.pk])
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+# No post_delete receiver for ProductImage: it would stop queryset deletes of
+# images from being a single DELETE. Code that deletes images bumps explicitly.
+@receiver(post_save, sender=ProductImage)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_catalog_cache(sender, **kwargs):
+    bump_catalog_version()
+
+
+@receiver(post_init, sender=Product)
+def remember_facet_key(sender, instance, **kwargs):
+    instance._facet_key = facet_key(instance)
+
+
+@receiver(post_save, sender=Product)
+def update_facets_on_save(sender, instance, created, **kwargs):
+    old = None if created else instance._facet_key
+    new = facet_key(instance)
+    apply_facet_change(old, new)
+    instance._facet_key = new
+
+
+@receiver(post_delete, sender=Product)
+def update_facets_on_delete(sender, instance, **kwargs):
+    apply_facet_change(instance._facet_key, None)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_facets(sender, **kwargs):
+    invalidate_unfiltered_facets()
+
+
+@receiver(post_save, sender=Product)
+def count_new_product(sender, instance, created, **kwargs):
+    if created:
+        increment('products')
+
+
+@receiver(post_delete, sender=Product)
+def count_deleted_product(sender, instance, **kwargs):
+    decrement('products')
@@ -0,0 +1,94 @@
+import json
+import os
+import tempfile
+from base64 import urlsafe_b64encode
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from luxe_backend.pagination import KeysetPagination
+from .inventory import enable_sharding
+from .models import Category, Product, ProductImage
+
+
+class CatalogCacheKeyTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Watches', slug='watches')
+        for i in range(3):
+            Product.objects.create(name=f'Chronograph {i}', description='d', price=Decimal('100.00'),
+                                   category=category, stock=5)
+
+    def test_empty_cursor_is_not_the_page_number_entry(self):
+        keyset = self.client.get('/api/products/?cursor=')
+        self.assertEqual(keyset['X-Cache'], 'MISS')
+        self.assertNotIn('count', keyset.data)
+
+        pages = self.client.get('/api/products/')
+        self.assertEqual(pages['X-Cache'], 'MISS')
+        self.assertIn('count', pages.data)
+        self.assertNotEqual(keyset['ETag'], pages['ETag'])
+
+    def test_malformed_cursor_is_a_404(self):
+        for values in (['garbage', 1], [{'a': 1}, 1], 5, 'x', ['2026-01-01T00:00:00Z']):
+            cursor = urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+            with self.subTest(values=values):
+                self.assertEqual(self.client.get(f'/api/products/?cursor={cursor}').status_code, 404)
+        self.assertEqual(self.client.get('/api/products/?cursor=%%%').status_code, 404)
+
+
+class ProductListQueryTests(APITestCase):
+    def setUp(self):
+        for c in range(3):
+            category = Category.objects.create(name=f'Category {c}', slug=f'category-{c}')
+            for i in range(12):
+                product = Product.objects.create(name=f'Product {c}-{i}', description='d', price=Decimal('50.00'),
+                                                 category=category, stock=10)
+                ProductImage.objects.bulk_create([
+                    ProductImage(product=product, url=f'https://img.example.com/{product.id}/{n}.jpg', order=n)
+                    for n in range(3)
+                ])
+                if i % 4 == 0:
+                    enable_sharding(product.id, 4)
+
+    def test_list_query_count_does_not_grow_with_page_size(self):
+        for size in (12, 36):
+            cache.clear()
+            with self.subTest(page_size=size), mock.patch.object(KeysetPagination, 'page_size', size):
+                # count, products (category joined, sharded stock summed), images
+                with self.assertNumQueries(3):
+                    response = self.client.get('/api/products/')
+                self.assertEqual(response['X-Cache'], 'MISS')
+                self.assertEqual(response.data['count'], 36)
+                rows = response.data['results']
+                self.assertEqual(len(rows), size)
+                self.assertTrue(all(len(row['images']) == 3 and row['category'] for row in rows))
+                self.assertTrue(all(row['stock'] == 10 for row in rows))
+
+
+class DerivativeServingTests(APITestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        os.makedirs(os.path.join(tmp.name, 'media', 'derivatives', 'ab'))
+        with open(os.path.join(tmp.name, 'media', 'derivatives', 'ab', 'abc-thumb.webp'), 'wb') as fh:
+            fh.write(b'RIFF')
+        with open(os.path.join(tmp.name, 'secret.txt'), 'w') as fh:
+            fh.write('SECRET_KEY')
+        settings_override = override_settings(MEDIA_ROOT=os.path.join(tmp.name, 'media'))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_serves_derivatives(self):
+        response = self.client.get('/media/derivatives/ab/abc-thumb.webp')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_refuses_paths_outside_the_derivatives_dir(self):
+        for url in ('/media/derivatives/../../secret.txt', '/media/derivatives/%2e%2e/%2e%2e/secret.txt',
+                    '/media/derivatives/ab/../../../secret.txt'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
@@ -1,15 +1,18 @@
 from django.urls import path
 from .views import (
-    ProductListView, ProductDetailView,
-    AdminProductListCreateView, AdminProductDetailView,
-    CategoryListView,
+    ProductListView, ProductDetailView, ProductFacetsView,
+    AdminProductListCreateView, AdminProductDetailView, AdminProductBulkUpdateView,
+    CategoryListView, CatalogCacheStatsView,
 )
 
 urlpatterns = [
     path('products/', ProductListView.as_view(), name='product-list'),
+    path('products/facets/', ProductFacetsView.as_view(), name='product-facets'),
     path('products/<int:pk>/', ProductDetailView.as_view(), name='product-detail'),
     path('categories/', CategoryListView.as_view(), name='category-list'),
     # Admin endpoints
     path('admin/products/', AdminProductListCreateView.as_view(), name='admin-product-list'),
+    path('admin/products/bulk/', AdminProductBulkUpdateView.as_view(), name='admin-product-bulk'),
     path('admin/products/<int:pk>/', AdminProductDetailView.as_view(), name='admin-product-detail'),
+    path('admin/cache/stats/', CatalogCacheStatsView.as_view(), name='admin-cache-stats'),
 ]
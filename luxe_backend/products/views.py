@@ -2,55 +2,93 @@ from rest_framework import generics, filters, status
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.db.models import Q
+from django.db import transaction
+from django.utils import timezone
+from luxe_backend.projection import SparseFieldsMixin
+from .bulk import sync_product_images
+from .cache import CatalogCacheMixin, bump_catalog_version, catalog_cache_stats
+from .facets import compute_facets, get_unfiltered_facets, invalidate_unfiltered_facets, render_facets
+from .inventory import set_stock
 from .models import Product, Category
-from .serializers import ProductSerializer, CategorySerializer
+from .search import index_products, search_products
+from .serializers import ProductSerializer, CategorySerializer, BulkProductUpdateSerializer, ProductProjection
 
+FILTER_PARAMS = ('search', 'category', 'min_price', 'max_price')
 
-class ProductListView(generics.ListAPIView):
+
+def filter_products(qs, params):
+    """Apply the catalog's search/category/price query params to `qs`."""
+    search = params.get('search')
+    if search:
+        qs = search_products(qs, search)
+
+    category = params.get('category')
+    if category:
+        qs = qs.filter(category__slug=category)
+
+    min_price = params.get('min_price')
+    max_price = params.get('max_price')
+    if min_price:
+        qs = qs.filter(price__gte=min_price)
+    if max_price:
+        qs = qs.filter(price__lte=max_price)
+
+    return qs
+
+
+class ProductListView(CatalogCacheMixin, SparseFieldsMixin, generics.ListAPIView):
     """
     GET /api/products/
     Query params:
-      - search=<term>       — filter by name or description
+      - search=<term>       — full-text search on name and description
       - category=<slug>     — filter by category slug
       - min_price=<num>     — minimum price
       - max_price=<num>     — maximum price
       - ordering=price / -price / created_at
+      - fields=id,name,price,primary_image — lean projection of just these fields
+      - expand=category,images               — nested data to include with `fields`
+    Search results are ordered by relevance unless `ordering` is given.
+    Responses are served from the versioned catalog cache.
     """
     serializer_class = ProductSerializer
+    projection_class = ProductProjection
     permission_classes = [IsAuthenticatedOrReadOnly]
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['price', 'created_at', 'name']
-    ordering = ['-created_at']
 
-    def get_queryset(self):
-        qs = Product.objects.filter(is_available=True)
+    @property
+    def ordering(self):
+        if self.request.query_params.get('search'):
+            return ['-search_rank', '-created_at']
+        return ['-created_at']
 
-        search = self.request.query_params.get('search')
-        if search:
-            qs = qs.filter(
-                Q(name__icontains=search) | Q(description__icontains=search)
-            )
+    def get_queryset(self):
+        qs = Product.objects.filter(is_available=True).with_related()
+        return filter_products(qs, self.request.query_params)
 
-        category = self.request.query_params.get('category')
-        if category:
-            qs = qs.filter(category__slug=category)
 
-        min_price = self.request.query_params.get('min_price')
-        max_price = self.request.query_params.get('max_price')
-        if min_price:
-            qs = qs.filter(price__gte=min_price)
-        if max_price:
-            qs = qs.filter(price__lte=max_price)
+class ProductFacetsView(CatalogCacheMixin, generics.RetrieveAPIView):
+    """
+    GET /api/products/facets/
+    Accepts the same filters as the product list and returns category
+    counts, a price histogram and min/max price for the matching products.
+    """
+    permission_classes = [IsAuthenticatedOrReadOnly]
 
-        return qs
+    def retrieve(self, request, *args, **kwargs):
+        base = Product.objects.filter(is_available=True)
+        if any(request.query_params.get(p) for p in FILTER_PARAMS):
+            state = compute_facets(filter_products(base, request.query_params))
+        else:
+            state = get_unfiltered_facets(base)
+        return Response(render_facets(state))
 
 
-class ProductDetailView(generics.RetrieveAPIView):
+class ProductDetailView(CatalogCacheMixin, generics.RetrieveAPIView):
     """
     GET /api/products/<id>/
     """
-    queryset = Product.objects.filter(is_available=True)
+    queryset = Product.objects.filter(is_available=True).with_related()
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
@@ -61,7 +99,7 @@ class AdminProductListCreateView(generics.ListCreateAPIView):
     GET  /api/admin/products/  — all products (including unavailable)
     POST /api/admin/products/  — create new product
     """
-    queryset = Product.objects.all()
+    queryset = Product.objects.with_related()
     serializer_class = ProductSerializer
     permission_classes = [IsAdminUser]
 
@@ -74,15 +112,114 @@ class AdminProductDetailView(generics.RetrieveUpdateDestroyAPIView):
     PATCH  /api/admin/products/<id>/
     DELETE /api/admin/products/<id>/
     """
-    queryset = Product.objects.all()
+    queryset = Product.objects.with_related()
     serializer_class = ProductSerializer
     permission_classes = [IsAdminUser]
 
 
-class CategoryListView(generics.ListAPIView):
+class AdminProductBulkUpdateView(APIView):
+    """
+    Admin only:
+    PATCH /api/admin/products/bulk/
+    Body: [{ id, price?, stock?, is_available?, name?, description?,
+             image_url?, category_id?, image_urls? }, ...]
+    Valid rows are applied together in one transaction with a single
+    bulk UPDATE; images are diffed so unchanged ones aren't rewritten.
+    Returns a result per row, in request order.
+    """
+    permission_classes = [IsAdminUser]
+
+    FIELDS = ('name', 'description', 'price', 'stock', 'is_available', 'image_url', 'category_id')
+
+    def patch(self, request):
+        rows = request.data
+        if not isinstance(rows, list) or not rows:
+            return Response({'detail': 'Expected a non-empty list of updates.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = [None] * len(rows)
+        valid   = {}   # product id -> (row index, validated data)
+        for i, row in enumerate(rows):
+            serializer = BulkProductUpdateSerializer(data=row)
+            if not serializer.is_valid():
+                row_id = row.get('id') if isinstance(row, dict) else None
+                results[i] = {'id': row_id, 'status': 'error', 'errors': serializer.errors}
+            elif serializer.validated_data['id'] in valid:
+                results[i] = {'id': serializer.validated_data['id'], 'status': 'error',
+                              'errors': {'id': ['Duplicate product in this request.']}}
+            else:
+                valid[serializer.validated_data['id']] = (i, serializer.validated_data)
+
+        images_written = 0
+        with transaction.atomic():
+            products     = Product.objects.select_for_update().in_bulk(valid.keys())
+            category_ids = {data['category_id'] for _, data in valid.values() if data.get('category_id')}
+            categories   = Category.objects.in_bulk(category_ids)
+
+            changed, fields, images = [], set(), {}
+            now = timezone.now()
+            for product_id, (i, data) in valid.items():
+                product = products.get(product_id)
+                if product is None:
+                    results[i] = {'id': product_id, 'status': 'error', 'errors': {'id': ['Product not found.']}}
+                    continue
+                if data.get('category_id') and data['category_id'] not in categories:
+                    results[i] = {'id': product_id, 'status': 'error', 'errors': {'category_id': ['Category not found.']}}
+                    continue
+
+                for field in self.FIELDS:
+                    if field in data:
+                        setattr(product, field, data[field])
+                        fields.add(field)
+                # Same rule as check_and_update_availability, written in the same UPDATE
+                if product.stock == 0 and product.is_available:
+                    product.is_available = False
+                if 'stock' in fields:
+                    fields.add('is_available')
+                if 'image_urls' in data:
+                    images[product_id] = data['image_urls']
+
+                product.updated_at = now
+                changed.append(product)
+                results[i] = {'id': product_id, 'status': 'updated'}
+
+            if changed and fields:
+                Product.objects.bulk_update(changed, sorted(fields) + ['updated_at'], batch_size=500)
+            for product in changed:
+                if product.stock_shards and 'stock' in valid[product.id][1]:
+                    set_stock(product.id, product.stock)
+            images_written = sync_product_images(images)
+
+            # bulk writes send no signals
+            if fields & {'name', 'description'}:
+                index_products(p.id for p in changed)
+            if changed:
+                bump_catalog_version()
+                invalidate_unfiltered_facets()
+
+        updated = sum(1 for r in results if r['status'] == 'updated')
+        return Response({
+            'updated':        updated,
+            'failed':         len(results) - updated,
+            'images_written': images_written,
+            'results':        results,
+        })
+
+
+class CategoryListView(CatalogCacheMixin, generics.ListAPIView):
     """
     GET /api/categories/
     """
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+
+
+class CatalogCacheStatsView(APIView):
+    """
+    Admin only:
+    GET /api/admin/cache/stats/  — catalog cache version and hit/miss counters
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(catalog_cache_stats())